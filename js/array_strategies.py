@@ -0,0 +1,317 @@
+from rpython.rlib import rerased
+
+from js.jsobj import W_IntNumber, W_FloatNumber
+from js.property import DataProperty, NOT_SET
+
+
+def _is_default_element(prop):
+    # elements as created by [[Put]], these are kept in the dense lists
+    return isinstance(prop, DataProperty) and prop.value is not None and \
+        prop.writable is True and prop.enumerable is True and prop.configurable is True
+
+
+# writes this far past the end of a dense list leave holes in it
+DENSE_MAX_GAP = 8
+# up to this length, arrays are kept dense when written anywhere within
+# their length, like the ones created by new Array(n) and then filled
+DENSE_MAX_PREALLOCATED = 1 << 16
+
+
+def _grows_dense(w_array, size, idx):
+    """ Whether element idx can be added to a dense list of the given size. """
+    if idx - size <= DENSE_MAX_GAP:
+        return True
+    if idx >= DENSE_MAX_PREALLOCATED:
+        return False
+    length = w_array.get_own_property(u'length').value.ToUInt32()
+    return idx <= length
+
+
+class ArrayStrategy(object):
+    """ Storage of the elements (the array index properties) of a W__Array.
+
+    The dense strategies keep the elements 0..n-1 in a list of unboxed
+    values, only the object strategy has holes (None) in it. Sparse arrays,
+    accessors and elements with non default attributes switch the array to
+    the dict strategy, which stores Property objects.
+    """
+    def init_storage(self, w_array):
+        raise NotImplementedError(self.__class__)
+
+    def getitem(self, w_array, idx):
+        """ Value of the data element idx, None if there is none. """
+        raise NotImplementedError(self.__class__)
+
+    def setitem(self, w_array, idx, w_value):
+        """ Store w_value in the existing writable data element idx.
+
+        Returns False if there is no such element.
+        """
+        raise NotImplementedError(self.__class__)
+
+    def get_prop(self, w_array, idx):
+        """ Property view of the element idx, None if there is none. """
+        raise NotImplementedError(self.__class__)
+
+    def set_prop(self, w_array, idx, prop):
+        raise NotImplementedError(self.__class__)
+
+    def delete(self, w_array, idx):
+        raise NotImplementedError(self.__class__)
+
+    def indexes(self, w_array):
+        raise NotImplementedError(self.__class__)
+
+    def switch_to_dict(self, w_array):
+        d = {}
+        for idx in self.indexes(w_array):
+            d[idx] = self.get_prop(w_array, idx)
+        w_array._array_strategy_ = dict_strategy
+        w_array._array_storage_ = dict_strategy.erase(d)
+
+
+class EmptyArrayStrategy(ArrayStrategy):
+    erase, unerase = rerased.new_erasing_pair("empty")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def init_storage(self, w_array):
+        w_array._array_storage_ = self.erase(None)
+
+    def getitem(self, w_array, idx):
+        return None
+
+    def setitem(self, w_array, idx, w_value):
+        return False
+
+    def get_prop(self, w_array, idx):
+        return None
+
+    def set_prop(self, w_array, idx, prop):
+        if not _is_default_element(prop):
+            strategy = dict_strategy
+        elif idx == 0:
+            strategy = _strategy_for(prop.value)
+        elif _grows_dense(w_array, 0, idx):
+            strategy = object_strategy
+        else:
+            strategy = dict_strategy
+
+        strategy.init_storage(w_array)
+        w_array._array_strategy_ = strategy
+        strategy.set_prop(w_array, idx, prop)
+
+    def delete(self, w_array, idx):
+        pass
+
+    def indexes(self, w_array):
+        return []
+
+
+class ListArrayStrategyMixin(object):
+    _mixin_ = True
+
+    def init_storage(self, w_array):
+        w_array._array_storage_ = self.erase([])
+
+    def getitem(self, w_array, idx):
+        l = self.unerase(w_array._array_storage_)
+        if idx < len(l):
+            return self.wrap(l[idx])
+        return None
+
+    def setitem(self, w_array, idx, w_value):
+        l = self.unerase(w_array._array_storage_)
+        if idx >= len(l):
+            return False
+
+        if self.is_correct_type(w_value):
+            l[idx] = self.unwrap(w_value)
+        else:
+            self.switch_to_object(w_array)
+            object_strategy.setitem(w_array, idx, w_value)
+        return True
+
+    def get_prop(self, w_array, idx):
+        l = self.unerase(w_array._array_storage_)
+        if idx < len(l):
+            return DataProperty(self.wrap(l[idx]), True, True, True)
+        return None
+
+    def set_prop(self, w_array, idx, prop):
+        l = self.unerase(w_array._array_storage_)
+        if _is_default_element(prop):
+            w_value = prop.value
+            if idx <= len(l) and self.is_correct_type(w_value):
+                if idx == len(l):
+                    l.append(self.unwrap(w_value))
+                else:
+                    l[idx] = self.unwrap(w_value)
+                return
+            if idx <= len(l) or _grows_dense(w_array, len(l), idx):
+                # the object strategy takes any value and has holes
+                self.switch_to_object(w_array)
+                object_strategy.set_prop(w_array, idx, prop)
+                return
+
+        self.switch_to_dict(w_array)
+        dict_strategy.set_prop(w_array, idx, prop)
+
+    def delete(self, w_array, idx):
+        l = self.unerase(w_array._array_storage_)
+        if idx >= len(l):
+            return
+
+        if idx == len(l) - 1:
+            l.pop()
+            return
+
+        self.switch_to_dict(w_array)
+        dict_strategy.delete(w_array, idx)
+
+    def indexes(self, w_array):
+        l = self.unerase(w_array._array_storage_)
+        return range(len(l))
+
+    def switch_to_object(self, w_array):
+        l = self.unerase(w_array._array_storage_)
+        objects = [self.wrap(item) for item in l]
+        w_array._array_strategy_ = object_strategy
+        w_array._array_storage_ = object_strategy.erase(objects)
+
+
+class IntArrayStrategy(ListArrayStrategyMixin, ArrayStrategy):
+    erase, unerase = rerased.new_erasing_pair("int")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, item):
+        return W_IntNumber(item)
+
+    def unwrap(self, w_value):
+        assert isinstance(w_value, W_IntNumber)
+        return w_value._intval_
+
+    def is_correct_type(self, w_value):
+        return isinstance(w_value, W_IntNumber)
+
+
+class FloatArrayStrategy(ListArrayStrategyMixin, ArrayStrategy):
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, item):
+        return W_FloatNumber(item)
+
+    def unwrap(self, w_value):
+        assert isinstance(w_value, W_FloatNumber)
+        return w_value._floatval_
+
+    def is_correct_type(self, w_value):
+        return isinstance(w_value, W_FloatNumber)
+
+
+class ObjectArrayStrategy(ListArrayStrategyMixin, ArrayStrategy):
+    erase, unerase = rerased.new_erasing_pair("object")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def setitem(self, w_array, idx, w_value):
+        l = self.unerase(w_array._array_storage_)
+        if idx >= len(l) or l[idx] is None:
+            return False
+        l[idx] = w_value
+        return True
+
+    def get_prop(self, w_array, idx):
+        l = self.unerase(w_array._array_storage_)
+        if idx < len(l) and l[idx] is not None:
+            return DataProperty(l[idx], True, True, True)
+        return None
+
+    def set_prop(self, w_array, idx, prop):
+        l = self.unerase(w_array._array_storage_)
+        if _is_default_element(prop):
+            if idx < len(l):
+                l[idx] = prop.value
+                return
+            if idx == len(l) or _grows_dense(w_array, len(l), idx):
+                for i in range(idx - len(l)):
+                    l.append(None)
+                l.append(prop.value)
+                return
+
+        self.switch_to_dict(w_array)
+        dict_strategy.set_prop(w_array, idx, prop)
+
+    def delete(self, w_array, idx):
+        l = self.unerase(w_array._array_storage_)
+        if idx == len(l) - 1:
+            l.pop()
+        elif idx < len(l):
+            l[idx] = None
+
+    def indexes(self, w_array):
+        l = self.unerase(w_array._array_storage_)
+        return [idx for idx in range(len(l)) if l[idx] is not None]
+
+    def wrap(self, item):
+        return item
+
+    def unwrap(self, w_value):
+        return w_value
+
+    def is_correct_type(self, w_value):
+        return True
+
+
+class DictArrayStrategy(ArrayStrategy):
+    erase, unerase = rerased.new_erasing_pair("dict")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def init_storage(self, w_array):
+        w_array._array_storage_ = self.erase({})
+
+    def getitem(self, w_array, idx):
+        prop = self.unerase(w_array._array_storage_).get(idx, None)
+        if isinstance(prop, DataProperty) and prop.writable is not NOT_SET:
+            return prop.value
+        return None
+
+    def setitem(self, w_array, idx, w_value):
+        prop = self.unerase(w_array._array_storage_).get(idx, None)
+        if isinstance(prop, DataProperty) and prop.writable is True:
+            prop.value = w_value
+            return True
+        return False
+
+    def get_prop(self, w_array, idx):
+        return self.unerase(w_array._array_storage_).get(idx, None)
+
+    def set_prop(self, w_array, idx, prop):
+        self.unerase(w_array._array_storage_)[idx] = prop
+
+    def delete(self, w_array, idx):
+        d = self.unerase(w_array._array_storage_)
+        if idx in d:
+            del d[idx]
+
+    def indexes(self, w_array):
+        return self.unerase(w_array._array_storage_).keys()
+
+
+def _strategy_for(w_value):
+    if isinstance(w_value, W_IntNumber):
+        return int_strategy
+    if isinstance(w_value, W_FloatNumber):
+        return float_strategy
+    return object_strategy
+
+
+empty_strategy = EmptyArrayStrategy()
+int_strategy = IntArrayStrategy()
+float_strategy = FloatArrayStrategy()
+object_strategy = ObjectArrayStrategy()
+dict_strategy = DictArrayStrategy()
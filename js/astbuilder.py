@@ -4,7 +4,7 @@ from rpython.rlib.objectmodel import enforceargs
 
 from js import operations
 
-from js.symbol_map import SymbolMap
+from js.symbol_map import SymbolMap, CatchScope
 
 
 class FakeParseError(Exception):
@@ -59,14 +59,18 @@ class ASTBuilder(RPythonVisitor):
     def __init__(self):
         self.funclists = []
         self.scopes = []
+        self.lexical_scopes = []
         self.sourcename = ""
         self.depth = -1
 
-    def enter_scope(self):
+    def enter_scope(self, parent=None, is_function=False):
         self.depth = self.depth + 1
 
-        new_scope = SymbolMap()
+        if parent is not None:
+            parent.function_scope().has_inner_scopes = True
+        new_scope = SymbolMap(parent, is_function)
         self.scopes.append(new_scope)
+        self.lexical_scopes.append(new_scope)
         #print 'starting new scope %d' % (self.depth, )
 
     def declare_symbol(self, symbol):
@@ -99,6 +103,7 @@ class ASTBuilder(RPythonVisitor):
     def exit_scope(self):
         self.depth = self.depth - 1
         self.scopes.pop()
+        self.lexical_scopes.pop()
         #print 'closing scope, returning to %d' % (self.depth, )
 
     def current_scope_variables(self):
@@ -113,6 +118,29 @@ class ASTBuilder(RPythonVisitor):
         except IndexError:
             return None
 
+    def lexical_scope(self):
+        # innermost scope, the catch blocks included
+        try:
+            return self.lexical_scopes[-1]
+        except IndexError:
+            return None
+
+    def enter_catch_scope(self, name):
+        parent = self.lexical_scope()
+        if parent is not None:
+            parent.function_scope().has_inner_scopes = True
+        self.lexical_scopes.append(CatchScope(parent, name))
+
+    def exit_catch_scope(self):
+        scope = self.lexical_scopes.pop()
+        scope.close()
+
+    def set_dynamic_scope(self):
+        # eval and with can add bindings at runtime
+        scope = self.current_scope()
+        if scope is not None:
+            scope.dynamic = True
+
     def set_sourcename(self, sourcename):
         self.stsourcename = sourcename  # XXX I should call this
 
@@ -185,7 +213,10 @@ class ASTBuilder(RPythonVisitor):
         for i in range((len(node.children) - 1) // 2):
             op = node.children[i * 2 + 1]
             pos = self.get_pos(op)
-            right = self.dispatch(node.children[i * 2 + 2])
+            if op.additional_info == '.':
+                right = self.dispatch_name(node.children[i * 2 + 2])
+            else:
+                right = self.dispatch(node.children[i * 2 + 2])
             result = self.BINOP_TO_CLS[op.additional_info](pos, left, right)
             left = result
         return left
@@ -310,16 +341,31 @@ class ASTBuilder(RPythonVisitor):
         n = unicode(name)
         #assert isinstance(n, unicode)
         index = self.declare_symbol(n)
+        if n == u'eval':
+            self.set_dynamic_scope()
+        scope = self.lexical_scope()
+        if scope is not None:
+            scope.add_reference(n)
         #if self.scopes.is_local(name):
             #local = self.scopes.get_local(name)
             #return operations.LocalIdentifier(pos, name, local)
-        return operations.Identifier(pos, n, index)
+        return operations.Identifier(pos, n, index, self.lexical_scope())
+
+    def dispatch_name(self, node):
+        # property and function names are no references to variables
+        if isinstance(node, Symbol) and node.symbol == 'IDENTIFIERNAME':
+            pos = self.get_pos(node)
+            n = unicode(node.additional_info)
+            index = self.declare_symbol(n)
+            return operations.Identifier(pos, n, index)
+        return self.dispatch(node)
 
     def visit_program(self, node):
         self.enter_scope()
         pos = self.get_pos(node)
         body = self.dispatch(node.children[0])
         scope = self.current_scope()
+        scope.close()
         final_scope = scope.finalize()
         return operations.Program(pos, body, final_scope)
 
@@ -349,11 +395,16 @@ class ASTBuilder(RPythonVisitor):
         return operations.SourceElements(pos, var_decl, func_decl, nodes, self.sourcename)
 
     def functioncommon(self, node, declaration=True):
-        self.enter_scope()
+        # declarations are instantiated with the enclosing function (10.5)
+        if declaration:
+            parent = self.current_scope()
+        else:
+            parent = self.lexical_scope()
+        self.enter_scope(parent, is_function=True)
 
         pos = self.get_pos(node)
         i = 0
-        identifier, i = self.get_next_expr(node, i)
+        identifier, i = self.get_next_expr(node, i, is_name=True)
         parameters, i = self.get_next_expr(node, i)
         functionbody, i = self.get_next_expr(node, i)
 
@@ -363,17 +414,20 @@ class ASTBuilder(RPythonVisitor):
             funcname = u''
 
         scope = self.current_scope()
+        scope.close()
         final_scope = scope.finalize()
 
         self.exit_scope()
 
         funcindex = -1
+        store_scope = None
         if declaration:
             f = unicode(funcname)
             #assert isinstance(f, unicode)
             funcindex = self.declare_symbol(f)
+            store_scope = parent
 
-        funcobj = operations.FunctionStatement(pos, funcname, funcindex, functionbody, final_scope)
+        funcobj = operations.FunctionStatement(pos, funcname, funcindex, functionbody, final_scope, store_scope)
 
         if declaration:
             self.declare_function(funcname, funcobj)
@@ -416,7 +470,10 @@ class ASTBuilder(RPythonVisitor):
             currnode = nodelist.pop(0)
             if isinstance(currnode, Symbol):
                 op = currnode
-                right = self.dispatch(nodelist.pop(0))
+                if op.additional_info == '.':
+                    right = self.dispatch_name(nodelist.pop(0))
+                else:
+                    right = self.dispatch(nodelist.pop(0))
                 left = self.BINOP_TO_CLS[op.additional_info](pos, left, right)
             else:
                 right = self.dispatch(currnode)
@@ -571,9 +628,11 @@ class ASTBuilder(RPythonVisitor):
         body = self.dispatch(node.children[3])
         return operations.ForIn(pos, left, right, body)
 
-    def get_next_expr(self, node, i):
+    def get_next_expr(self, node, i, is_name=False):
         if isinstance(node.children[i], Symbol) and node.children[i].additional_info in [';', ')', '(', '}']:
             return None, i + 1
+        elif is_name:
+            return self.dispatch_name(node.children[i]), i + 2
         else:
             return self.dispatch(node.children[i]), i + 2
 
@@ -616,7 +675,9 @@ class ASTBuilder(RPythonVisitor):
         finallyblock = None
         if node.children[1].children[0].additional_info == "catch":
             catchparam = self.dispatch(node.children[1].children[1])
+            self.enter_catch_scope(catchparam.get_literal())
             catchblock = self.dispatch(node.children[1].children[2])
+            self.exit_catch_scope()
             if len(node.children) > 2:
                 finallyblock = self.dispatch(node.children[2].children[1])
         else:
@@ -629,6 +690,7 @@ class ASTBuilder(RPythonVisitor):
 
     def visit_withstatement(self, node):
         pos = self.get_pos(node)
+        self.set_dynamic_scope()
         identifier = self.dispatch(node.children[0])
         body = self.dispatch(node.children[1])
         return operations.With(pos, identifier, body)
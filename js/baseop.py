@@ -2,7 +2,7 @@
 """ Base operations implementations
 """
 
-from js.jsobj import W_String, W_IntNumber, W_FloatNumber
+from js.jsobj import W_String, W_IntNumber, W_FloatNumber, concat_strings
 from js.object_space import _w, isint, isstr, isfloat
 
 from rpython.rlib.rarithmetic import ovfcheck
@@ -20,17 +20,14 @@ def plus(lval, rval):
     rprim = rval.ToPrimitive()
 
     if isinstance(lprim, W_String) or isinstance(rprim, W_String):
-        sleft = lprim.to_string()
-        sright = rprim.to_string()
-        return W_String(sleft + sright)
+        if not isinstance(lprim, W_String):
+            lprim = W_String(lprim.to_string())
+        if not isinstance(rprim, W_String):
+            rprim = W_String(rprim.to_string())
+        return concat_strings(lprim, rprim)
     # hot path
     if isint(lprim) and isint(rprim):
-        ileft = lprim.ToInteger()
-        iright = rprim.ToInteger()
-        try:
-            return W_IntNumber(ovfcheck(ileft + iright))
-        except OverflowError:
-            return W_FloatNumber(float(ileft) + float(iright))
+        return plus_int(lprim.ToInteger(), rprim.ToInteger())
     else:
         fleft = lprim.ToNumber()
         fright = rprim.ToNumber()
@@ -53,13 +50,7 @@ def decrement(ctx, nleft, constval=1):
 
 def sub(ctx, nleft, nright):
     if isint(nleft) and isint(nright):
-        # XXX fff
-        ileft = nleft.ToInt32()
-        iright = nright.ToInt32()
-        try:
-            return W_IntNumber(ovfcheck(ileft - iright))
-        except OverflowError:
-            return W_FloatNumber(float(ileft) - float(iright))
+        return sub_int(nleft.ToInteger(), nright.ToInteger())
     fleft = nleft.ToNumber()
     fright = nright.ToNumber()
     return W_FloatNumber(fleft - fright)
@@ -68,17 +59,34 @@ def sub(ctx, nleft, nright):
 def mult(ctx, nleft, nright):
     if isint(nleft) and isint(nright):
         # XXXX test & stuff
-        ileft = nleft.ToInteger()
-        iright = nright.ToInteger()
-        try:
-            return W_IntNumber(ovfcheck(ileft * iright))
-        except OverflowError:
-            return W_FloatNumber(float(ileft) * float(iright))
+        return mult_int(nleft.ToInteger(), nright.ToInteger())
     fleft = nleft.ToNumber()
     fright = nright.ToNumber()
     return W_FloatNumber(fleft * fright)
 
 
+# int arithmetic, the result is a float number if it overflows
+def plus_int(ileft, iright):
+    try:
+        return W_IntNumber(ovfcheck(ileft + iright))
+    except OverflowError:
+        return W_FloatNumber(float(ileft) + float(iright))
+
+
+def sub_int(ileft, iright):
+    try:
+        return W_IntNumber(ovfcheck(ileft - iright))
+    except OverflowError:
+        return W_FloatNumber(float(ileft) - float(iright))
+
+
+def mult_int(ileft, iright):
+    try:
+        return W_IntNumber(ovfcheck(ileft * iright))
+    except OverflowError:
+        return W_FloatNumber(float(ileft) * float(iright))
+
+
 def mod(ctx, w_left, w_right):
     left = w_left.ToNumber()
     right = w_right.ToNumber()
@@ -159,7 +167,7 @@ def _base_compare(x, y, _compare):
 
     if isfloat(x) and isfloat(y):
         n1 = x.ToNumber()
-        n2 = x.ToNumber()
+        n2 = y.ToNumber()
         return _compare(n1, n2)
 
     p1 = x.ToPrimitive('Number')
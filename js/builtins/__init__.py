@@ -8,7 +8,7 @@ def new_native_function(function, name=u'', params=[]):
     from js.object_space import object_space
 
     jsfunc = JsNativeFunction(function, name)
-    obj = object_space.new_func(jsfunc, formal_parameter_list=params)
+    obj = object_space.new_native_func(jsfunc, formal_parameter_list=params)
     return obj
 
 
@@ -38,9 +38,10 @@ def setup_builtins(global_object):
     from js.object_space import object_space
 
     # 15.2.4 Properties of the Object Prototype Object
-    from js.jsobj import W_BasicObject
+    from js.jsobj import W_BasicObject, proto_desc
     w_ObjectPrototype = W_BasicObject()
     object_space.proto_object = w_ObjectPrototype
+    w_ObjectPrototype.define_own_property(u'__proto__', proto_desc)
 
     # 15.3.2
     from js.jsobj import W_FunctionConstructor
@@ -52,7 +53,7 @@ def setup_builtins(global_object):
 
     import js.builtins.function
     empty_func = JsNativeFunction(js.builtins.function.empty, u'Empty')
-    w_FunctionPrototype = object_space.new_func(empty_func)
+    w_FunctionPrototype = object_space.new_native_func(empty_func)
     object_space.assign_proto(w_FunctionPrototype, object_space.proto_object)
     object_space.proto_function = w_FunctionPrototype
 
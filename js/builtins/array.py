@@ -1,3 +1,6 @@
+from rpython.rlib.listsort import make_timsort_class
+from rpython.rlib.rstring import UnicodeBuilder
+
 from js.builtins import get_arg
 from js.object_space import w_return, _w, isnull_or_undefined, newundefined
 
@@ -115,25 +118,24 @@ def join(this, args):
     if length == 0:
         return u''
 
-    element0 = o.get(u'0')
-    if isnull_or_undefined(element0):
-        r = u''
-    else:
-        r = element0.to_string()
-
-    k = 1
-
-    while(k < length):
-        s = r + sep
-        element = o.get(unicode(str(k)))
-        if isnull_or_undefined(element):
-            _next = u''
+    parts = []
+    size = len(sep) * (length - 1)
+    for k in xrange(length):
+        element = _get_element(o, k)
+        if element is None or isnull_or_undefined(element):
+            part = u''
         else:
-            _next = element.to_string()
-        r = s + _next
-        k += 1
+            part = element.to_string()
+        size += len(part)
+        parts.append(part)
+
+    builder = UnicodeBuilder(size)
+    builder.append(parts[0])
+    for k in xrange(1, length):
+        builder.append(sep)
+        builder.append(parts[k])
 
-    return r
+    return builder.build()
 
 
 # 15.4.4.6
@@ -208,9 +210,9 @@ def reverse(this, args):
 
 @w_return
 def last_index_of(this, args):
-    obj = this
+    obj = this.ToObject()
     elem = get_arg(args, 0)
-    length = this.get(u'length').ToUInt32()
+    length = obj.get(u'length').ToUInt32()
     from_index = length
 
     if len(args) > 1:
@@ -230,8 +232,8 @@ def last_index_of(this, args):
 
 @w_return
 def index_of(this, args):
-    obj = this
-    length = this.get(u'length').ToUInt32()
+    obj = this.ToObject()
+    length = obj.get(u'length').ToUInt32()
     elem = get_arg(args, 0)
     from_index = get_arg(args, 1).ToUInt32()
 
@@ -244,8 +246,8 @@ def index_of(this, args):
 
 
 def for_each(this, args):
-    obj = this
-    length = this.get(u'length').ToUInt32()
+    obj = this.ToObject()
+    length = obj.get(u'length').ToUInt32()
 
     callback = get_arg(args, 0)
     from js.jsobj import W_BasicFunction
@@ -256,74 +258,124 @@ def for_each(this, args):
         callback.Call(args=[x], this=newundefined())
 
 
-# 15.4.4.11
-@w_return
-def sort(this, args):
-    obj = this
-    length = this.get(u'length').ToUInt32()
+def _get_element(obj, idx):
+    # value of the element idx, None for holes
+    from js.jsobj import W__Array
+    if isinstance(obj, W__Array):
+        value = obj._array_strategy_.getitem(obj, idx)
+        if value is not None:
+            return value
 
-    comparefn = get_arg(args, 0)
+    name = unicode(str(idx))
+    if obj.has_property(name):
+        return obj.get(name)
+    return None
 
-    # TODO check if implementation defined
-
-    # sorts need to be in-place, lets do some very non-fancy bubble sort for starters
-    while True:
-        swapped = False
-        for i in xrange(1, length):
-            x = unicode(str(i - 1))
-            y = unicode(str(i))
-            comp = sort_compare(obj, x, y, comparefn)
-            if comp == 1:
-                tmp_x = obj.get(x)
-                tmp_y = obj.get(y)
-                obj.put(x, tmp_y)
-                obj.put(y, tmp_x)
-                swapped = True
-        if not swapped:
-            break
 
-    return obj
+_StringTimSort = make_timsort_class()
 
 
-def sort_compare(obj, j, k, comparefn=newundefined()):
-    from js.object_space import isundefined
+class _StringSort(_StringTimSort):
+    # default order, compares the precomputed string values
+    def lt(self, a, b):
+        return a[0] < b[0]
 
-    j_string = j
-    k_string = k
-    has_j = obj.has_property(j)
-    has_k = obj.has_property(k)
 
-    if has_j is False and has_k is False:
-        return 0
-    if has_j is False:
-        return 1
-    if has_k is False:
-        return -1
+_CompareFnTimSort = make_timsort_class()
+
+
+class _CompareFnSort(_CompareFnTimSort):
+    def __init__(self, list, comparefn):
+        _CompareFnTimSort.__init__(self, list)
+        self.comparefn = comparefn
+
+    def lt(self, a, b):
+        res = self.comparefn.Call(args=[a, b], this=newundefined())
+        return res.ToNumber() < 0
+
+
+_NumberTimSort = make_timsort_class()
+
+
+class _NumberSort(_NumberTimSort):
+    # comparators recognised by JsCode.numeric_comparator, a - b < 0 exactly
+    # when a < b for numbers
+    def __init__(self, list, descending):
+        _NumberTimSort.__init__(self, list)
+        self.descending = descending
+
+    def lt(self, a, b):
+        if self.descending:
+            return b[0] < a[0]
+        return a[0] < b[0]
 
-    x = obj.get(j_string)
-    y = obj.get(k_string)
 
-    if isundefined(x) and isundefined(y):
+def _numeric_comparator(comparefn, values):
+    # 1 or -1 if the values can be sorted without calling comparefn
+    from js.jsobj import W__Function, W_Number
+    if not isinstance(comparefn, W__Function):
         return 0
-    if isundefined(x):
-        return 1
-    if isundefined(y):
-        return -1
+    sign = comparefn.code().numeric_comparator()
+    if sign == 0:
+        return 0
+    for value in values:
+        if not isinstance(value, W_Number):
+            return 0
+    return sign
 
-    if not isundefined(comparefn):
-        if not comparefn.is_callable():
-            from js.exception import JsTypeError
-            raise JsTypeError(u'')
 
-        from js.jsobj import W_BasicFunction
+# 15.4.4.11
+@w_return
+def sort(this, args):
+    from js.object_space import isundefined
+    from js.jsobj import W_BasicFunction
+
+    obj = this.ToObject()
+    length = obj.get(u'length').ToUInt32()
+
+    comparefn = get_arg(args, 0)
+    if not isundefined(comparefn) and not comparefn.is_callable():
+        from js.exception import JsTypeError
+        raise JsTypeError(u'')
+
+    # pull the elements out once, undefined sorts after all other values and
+    # holes after undefined
+    values = []
+    undefined_count = 0
+    for i in xrange(length):
+        value = _get_element(obj, i)
+        if value is None:
+            continue
+        if isundefined(value):
+            undefined_count += 1
+        else:
+            values.append(value)
+
+    if isundefined(comparefn):
+        items = [(value.to_string(), value) for value in values]
+        _StringSort(items).sort()
+        values = [item[1] for item in items]
+    else:
         assert isinstance(comparefn, W_BasicFunction)
-        res = comparefn.Call(args=[x, y], this=newundefined())
-        return res.ToInteger()
-
-    x_string = x.to_string()
-    y_string = y.to_string()
-    if x_string < y_string:
-        return -1
-    if x_string > y_string:
-        return 1
-    return 0
+        sign = _numeric_comparator(comparefn, values)
+        if sign != 0:
+            numbers = [(value.ToNumber(), value) for value in values]
+            _NumberSort(numbers, sign < 0).sort()
+            values = [item[1] for item in numbers]
+        else:
+            _CompareFnSort(values, comparefn).sort()
+
+    idx = 0
+    for value in values:
+        obj.w_put(_w(idx), value, True)
+        idx += 1
+
+    for i in xrange(undefined_count):
+        obj.w_put(_w(idx), newundefined(), True)
+        idx += 1
+
+    while idx < length:
+        obj.delete(unicode(str(idx)), True)
+        idx += 1
+
+    return obj
@@ -124,7 +124,7 @@ def value_of(this, args):
 # 15.9.5.9
 @w_return
 def get_time(this, args):
-    return this.PrimitiveValue()
+    return _date_object(this).PrimitiveValue()
 
 
 # 15.9.5.10
@@ -374,11 +374,12 @@ def get_year(this, args):
 # B.2.5
 @w_return
 def set_year(this, args):
+    date = _date_object(this)
     arg0 = get_arg(args, 0)
     year = arg0.ToInteger()
 
     if isnan(year) or year < 0 or year > 99:
-        this.set_primitive_value(_w(NAN))
+        date.set_primitive_value(_w(NAN))
         return NAN
 
     y = year + 1900
@@ -657,6 +658,15 @@ class JsTime(object):
         return o
 
 
+def _date_object(w_obj):
+    # natives get primitive this values unboxed
+    from js.jsobj import W_DateObject
+    if not isinstance(w_obj, W_DateObject):
+        from js.exception import JsTypeError
+        raise JsTypeError(u'this is not a Date object')
+    return w_obj
+
+
 def make_jstime(w_obj):
-    msecs = w_obj.PrimitiveValue().ToInteger()
+    msecs = _date_object(w_obj).PrimitiveValue().ToInteger()
     return JsTime(msecs)
@@ -1,10 +1,13 @@
 from js.object_space import _w
 
 
+# 15.2.4.2
 def to_string(this, args):
-    s = "[object %s]" % (this.klass(), )
+    o = this.ToObject()
+    s = "[object %s]" % (o.klass(), )
     return _w(s)
 
 
+# 15.2.4.4
 def value_of(this, args):
-    return this
+    return this.ToObject()
@@ -23,16 +23,29 @@ class EnvironmentRecord(object):
     def implicit_this_value(self):
         raise NotImplementedError
 
+    def get_binding_value_at(self, idx):
+        raise NotImplementedError
+
+    def set_mutable_binding_at(self, idx, value):
+        raise NotImplementedError
+
 
 class DeclarativeEnvironmentRecord(EnvironmentRecord):
     _immutable_fields_ = ['_binding_slots_', '_binding_resize_']
 
-    def __init__(self, size=0, resize=True):
+    def __init__(self, size=0, resize=True, layout=None):
         EnvironmentRecord.__init__(self)
-        self._binding_map_ = new_map()
-        self._binding_slots_ = [None] * size
+        if layout is not None:
+            # all bindings of function code are mutable and not deletable,
+            # see js.symbol_map.EnvironmentLayout
+            self._binding_map_ = layout.binding_map
+            self._binding_slots_ = layout.new_slots()
+            self._mutable_bindings_map_ = layout.binding_map
+        else:
+            self._binding_map_ = new_map()
+            self._binding_slots_ = [None] * size
+            self._mutable_bindings_map_ = new_map()
         self._binding_resize_ = resize
-        self._mutable_bindings_map_ = new_map()
         self._deletable_bindings_map_ = new_map()
 
     def _is_mutable_binding(self, identifier):
@@ -86,6 +99,13 @@ class DeclarativeEnvironmentRecord(EnvironmentRecord):
         self._binding_slots_ = self._binding_slots_[:idx] + self._binding_slots_[i:]  # len(self._binding_slots_)]
         self._binding_map_ = self._binding_map_.delete(name)
 
+    # access by the slots js.symbol_map resolves identifiers to
+    def get_binding_value_at(self, idx):
+        return self._binding_slots_[idx]
+
+    def set_mutable_binding_at(self, idx, value):
+        self._binding_slots_[idx] = value
+
     # 10.2.1.1.2
     def create_mutuable_binding(self, identifier, deletable):
         from js.object_space import newundefined
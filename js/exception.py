@@ -77,7 +77,10 @@ class JsRangeError(JsException):
         self.value = value
 
     def _msg(self):
-        return u'RangeError: %s'  # % (self.value, )
+        value = self.value
+        if value is None:
+            return u'RangeError'
+        return u'RangeError: ' + value
 
 
 class JsSyntaxError(JsException):
@@ -4,17 +4,34 @@ from rpython.rlib import jit
 
 
 class ExecutionContext(StackMixin):
-    _immutable_fields_ = ['_stack_', '_this_binding_', '_lexical_environment_', '_variable_environment_', '_refs_', '_code_', '_formal_parameters_', '_argument_values_', '_w_func_']  # TODO why are _formal_parameters_, _w_func_ etc. required here?
-    _virtualizable2_ = ['_stack_[*]', '_stack_pointer_', '_refs_[*]']
+    _immutable_fields_ = ['_stack_', '_this_binding_', '_lexical_environment_', '_variable_environment_', '_refs_', '_locals_', '_code_', '_formal_parameters_', '_argument_values_', '_w_func_']  # TODO why are _formal_parameters_, _w_func_ etc. required here?
+    _virtualizable2_ = ['_stack_[*]', '_stack_pointer_', '_refs_[*]', '_locals_[*]']
     _settled_ = True
 
-    def __init__(self, stack_size=1, refs_size=1):
+    def __init__(self, stack_size=1, refs_size=1, locals_size=0, pool=None):
         self = jit.hint(self, access_directly=True, fresh_virtualizable=True)
         self._lexical_environment_ = None
         self._variable_environment_ = None
         self._this_binding_ = None
-        self._refs_ = [None] * refs_size
-        self._init_stack_(stack_size)
+        if pool is None:
+            self._refs_ = [None] * refs_size
+            self._locals_ = [newundefined()] * locals_size
+            self._init_stack_(stack_size)
+        else:
+            self._refs_ = pool.acquire_refs(refs_size)
+            self._locals_ = pool.acquire_values(locals_size)
+            for i in range(locals_size):
+                self._locals_[i] = newundefined()
+            self._stack_ = pool.acquire_values(stack_size)
+            self._stack_pointer_ = 0
+
+    def release_to(self, pool):
+        """ Hand the lists of the context back to pool, it must not be used
+        afterwards.
+        """
+        pool.release_values(self._stack_)
+        pool.release_values(self._locals_)
+        pool.release_refs(self._refs_)
 
     def stack_append(self, value):
         self._stack_append(value)
@@ -25,19 +42,8 @@ class ExecutionContext(StackMixin):
     def stack_top(self):
         return self._stack_top()
 
-    @jit.unroll_safe
     def stack_pop_n(self, n):
-        if n < 1:
-            return []
-
-        r = []
-        i = n
-        while i > 0:
-            i -= 1
-            e = self._stack_pop()
-            r = [e] + r
-
-        return r
+        return self._stack_pop_n(n)
 
     def this_binding(self):
         return self._this_binding_
@@ -54,6 +60,13 @@ class ExecutionContext(StackMixin):
     def set_lexical_environment(self, lex_env):
         self._lexical_environment_ = lex_env
 
+    @jit.unroll_safe
+    def lexical_environment_at(self, depth):
+        lex_env = self.lexical_environment()
+        for i in range(depth):
+            lex_env = lex_env.outer_environment
+        return lex_env
+
     # 10.5
     @jit.unroll_safe
     def declaration_binding_initialization(self):
@@ -81,6 +94,10 @@ class ExecutionContext(StackMixin):
                     v = newundefined()
                 else:
                     v = args[n - 1]
+                local = code.local_index(arg_name)
+                if local >= 0:
+                    self.set_local(local, v)
+                    continue
                 arg_already_declared = env.has_binding(arg_name)
                 if arg_already_declared is False:
                     env.create_mutuable_binding(arg_name, configurable_bindings)
@@ -89,6 +106,8 @@ class ExecutionContext(StackMixin):
         # 5.
         func_declarations = code.functions()
         for fn in func_declarations:
+            if code.local_index(fn) >= 0:
+                continue
             fo = None
             func_already_declared = env.has_binding(fn)
             if func_already_declared is False:
@@ -97,15 +116,13 @@ class ExecutionContext(StackMixin):
                 pass  # see 10.5 5.e
             env.set_mutable_binding(fn, fo, False)
 
-        arguments_already_declared = env.has_binding(u'arguments')
         # 7.
-        if code.is_function_code() and arguments_already_declared is False:
-            from js.jsobj import W_Arguments
-            # TODO get calling W_Function
-            func = self._w_func_
-            arguments = self._argument_values_
-            names = code.params()
-            args_obj = W_Arguments(func, names, arguments, env, strict)
+        arguments_local = code.local_index(u'arguments')
+        if code.has_arguments_object() and arguments_local >= 0:
+            # created on first use, see LOAD_ARGUMENTS
+            self.set_local(arguments_local, None)
+        elif code.has_arguments_object() and env.has_binding(u'arguments') is False:
+            args_obj = self.arguments_object()
 
             if strict is True:
                 env.create_immutable_bining(u'arguments')
@@ -117,11 +134,35 @@ class ExecutionContext(StackMixin):
         # 8.
         var_declarations = code.variables()
         for dn in var_declarations:
+            if code.local_index(dn) >= 0:
+                continue
             var_already_declared = env.has_binding(dn)
             if var_already_declared is False:
                 env.create_mutuable_binding(dn, configurable_bindings)
                 env.set_mutable_binding(dn, newundefined(), False)
 
+    # 10.6
+    def arguments_object(self):
+        from js.jsobj import W_Arguments
+        code = jit.promote(self._code_)
+        # TODO get calling W_Function
+        func = self._w_func_
+        arguments = self._argument_values_
+        names = code.params()
+        env = self._variable_environment_.environment_record
+        return W_Arguments(func, names, arguments, env, self._strict_)
+
+    # frame local variables, see js.symbol_map
+    def get_local(self, index):
+        assert index < len(self._locals_)
+        assert index >= 0
+        return self._locals_[index]
+
+    def set_local(self, index, value):
+        assert index < len(self._locals_)
+        assert index >= 0
+        self._locals_[index] = value
+
     def _get_refs(self, index):
         assert index < len(self._refs_)
         assert index >= 0
@@ -213,17 +254,43 @@ class EvalExecutionContext(_DynamicExecutionContext):
         self.declaration_binding_initialization()
 
 
+# 10.4.3
+def function_this_binding(this, strict):
+    from js.jsobj import W_BasicObject
+    from js.object_space import object_space, isnull_or_undefined
+
+    if strict:
+        return this
+    if this is None or isnull_or_undefined(this):
+        return object_space.global_object
+    elif not isinstance(this, W_BasicObject):
+        # primitive this values are boxed
+        return this.ToObject()
+    elif this.klass() is not 'Object':
+        return this.ToObject()
+    return this
+
+
+def native_this_binding(this):
+    """ Builtins take primitive this values as they are and box them
+    themselves where they need an object, so only the missing this is bound.
+    """
+    from js.object_space import object_space, isnull_or_undefined
+
+    if this is None or isnull_or_undefined(this):
+        return object_space.global_object
+    return this
+
+
 class FunctionExecutionContext(ExecutionContext):
     _immutable_fields_ = ['_scope_', '_calling_context_']
 
-    def __init__(self, code, formal_parameters=[], argv=[], this=newundefined(), strict=False, scope=None, w_func=None):
-        from js.jsobj import W_BasicObject
-        from js.object_space import object_space, isnull_or_undefined
-
+    def __init__(self, code, formal_parameters=[], argv=[], this=newundefined(), strict=False, scope=None, w_func=None, pool=None):
         stack_size = code.estimated_stack_size()
         env_size = code.env_size() + 1  # neet do add one for the arguments object
+        locals_size = code.locals_size()
 
-        ExecutionContext.__init__(self, stack_size, env_size)
+        ExecutionContext.__init__(self, stack_size, env_size, locals_size, pool)
 
         self._code_ = code
         self._argument_values_ = argv
@@ -232,29 +299,68 @@ class FunctionExecutionContext(ExecutionContext):
         self._w_func_ = w_func
         self._calling_context_ = None
 
-        from js.lexical_environment import DeclarativeEnvironment
-        localEnv = DeclarativeEnvironment(scope, env_size, False)
+        layout = code.environment_layout()
+        if code.has_environment():
+            from js.lexical_environment import DeclarativeEnvironment
+            if layout is not None:
+                localEnv = DeclarativeEnvironment(scope, layout=layout)
+            else:
+                localEnv = DeclarativeEnvironment(scope, env_size, False)
+        else:
+            # nothing can capture the bindings, they all are frame locals
+            localEnv = scope
         self._lexical_environment_ = localEnv
         self._variable_environment_ = localEnv
 
-        if strict:
-            self._this_binding_ = this
+        from js.functions import JsNativeFunction
+        if isinstance(code, JsNativeFunction):
+            self._this_binding_ = native_this_binding(this)
         else:
-            if this is None or isnull_or_undefined(this):
-                self._this_binding_ = object_space.global_object
-            else:
-                assert isinstance(this, W_BasicObject)
+            self._this_binding_ = function_this_binding(this, strict)
 
-                if this.klass() is not 'Object':
-                    self._this_binding_ = this.ToObject()
-                else:
-                    self._this_binding_ = this
+        if layout is not None:
+            self.function_binding_initialization(layout)
+        else:
+            self.declaration_binding_initialization()
 
-        self.declaration_binding_initialization()
+    # 10.5 for function code, the bindings 5. to 8. create are already
+    # part of the environment the layout starts with
+    @jit.unroll_safe
+    def function_binding_initialization(self, layout):
+        layout = jit.promote(layout)
+        args = self._argument_values_
+        arg_count = len(args)
+        # 4.
+        for n in range(len(layout.parameter_slots)):
+            if n < arg_count:
+                v = args[n]
+            else:
+                v = newundefined()
+            local = layout.parameter_locals[n]
+            if local >= 0:
+                self.set_local(local, v)
+            else:
+                env = self._variable_environment_.environment_record
+                env.set_mutable_binding_at(layout.parameter_slots[n], v)
+
+        # 7.
+        if layout.arguments_local >= 0:
+            # created on first use, see LOAD_ARGUMENTS
+            self.set_local(layout.arguments_local, None)
+        elif layout.arguments_slot >= 0:
+            env = self._variable_environment_.environment_record
+            env.set_mutable_binding_at(layout.arguments_slot, self.arguments_object())
 
     def argv(self):
         return self._argument_values_
 
+    def implicit_this_binding(self):
+        code = jit.promote(self._code_)
+        if not code.has_environment():
+            # 10.2.1.1.6 of the environment the function did not allocate
+            return newundefined()
+        return ExecutionContext.implicit_this_binding(self)
+
 
 class SubExecutionContext(_DynamicExecutionContext):
     def __init__(self, parent):
@@ -0,0 +1,84 @@
+from rpython.rlib import jit
+
+
+class ListPool(object):
+    """ Free lists of fixed-size lists, bucketed by their size.
+
+    allocations and reuses count the lists acquire created and handed out
+    again. Mixed into one class per item type, see ValuePool and RefPool.
+    """
+    _mixin_ = True
+    MAX_FREE = 64
+
+    def __init__(self):
+        self.free = {}
+        self.allocations = 0
+        self.reuses = 0
+
+    def acquire(self, size):
+        free = self.free.get(size, None)
+        if free:
+            self.reuses += 1
+            return free.pop()
+        self.allocations += 1
+        return [None] * size
+
+    def release(self, lst):
+        """ Return lst to the pool. All of it is cleared, the stack pointer
+        of a frame does not tell which entries were used.
+        """
+        for i in range(len(lst)):
+            lst[i] = None
+        size = len(lst)
+        free = self.free.get(size, None)
+        if free is None:
+            free = []
+            self.free[size] = free
+        if len(free) < self.MAX_FREE:
+            free.append(lst)
+
+
+class ValuePool(ListPool):
+    pass
+
+
+class RefPool(ListPool):
+    pass
+
+
+class FramePool(object):
+    """ Reuses the operand stacks, frame locals and reference caches of
+    function calls that returned, see FunctionExecutionContext.
+
+    Traced code allocates the arrays of its virtualizable frames virtually,
+    the pool is only used by the interpreter.
+    """
+    def __init__(self):
+        self.values = ValuePool()
+        self.refs = RefPool()
+
+    def acquire_values(self, size):
+        if jit.we_are_jitted():
+            return [None] * size
+        return self.values.acquire(size)
+
+    def acquire_refs(self, size):
+        if jit.we_are_jitted():
+            return [None] * size
+        return self.refs.acquire(size)
+
+    def release_values(self, lst):
+        if jit.we_are_jitted():
+            return
+        self.values.release(lst)
+
+    def release_refs(self, lst):
+        if jit.we_are_jitted():
+            return
+        self.refs.release(lst)
+
+    def allocations(self):
+        return self.values.allocations + self.refs.allocations
+
+    def reuses(self):
+        return self.values.reuses + self.refs.reuses
@@ -1,3 +1,5 @@
+from rpython.rlib import jit
+
 from js.object_space import _w
 
 
@@ -47,6 +49,24 @@ class JsBaseFunction(object):
     def env_size(self):
         return 0
 
+    def locals_size(self):
+        return 0
+
+    def local_index(self, name):
+        return -1
+
+    def has_environment(self):
+        return True
+
+    def numeric_comparator(self):
+        return 0
+
+    def has_arguments_object(self):
+        return False
+
+    def environment_layout(self):
+        return None
+
 
 class JsNativeFunction(JsBaseFunction):
     _immutable_fields_ = ['_name_', '_function_']
@@ -64,12 +84,15 @@ class JsNativeFunction(JsBaseFunction):
 
         args = ctx.argv()
         this = ctx.this_binding()
-        assert isinstance(self, JsNativeFunction)
-        res = self._function_(this, args)
-        w_res = _w(res)
+        w_res = self.call(this, args)
         compl = ReturnCompletion(value=w_res)
         return compl
 
+    def call(self, this, args):
+        assert isinstance(self, JsNativeFunction)
+        res = self._function_(this, args)
+        return _w(res)
+
     def to_string(self):
         name = self.name()
         if name is not None:
@@ -94,7 +117,7 @@ class JsIntimateFunction(JsNativeFunction):
 
 
 class JsExecutableCode(JsBaseFunction):
-    _immutable_fields_ = ['_js_code_', '_stack_size_', '_symbol_size_']
+    _immutable_fields_ = ['_js_code_', '_stack_size_', '_symbol_size_', '_locals_size_', '_has_environment_', '_has_arguments_object_', '_environment_layout_', '_comparator_']
 
     def __init__(self, js_code):
         from js.jscode import JsCode
@@ -103,6 +126,11 @@ class JsExecutableCode(JsBaseFunction):
         self._js_code_.compile()
         self._stack_size_ = js_code.estimated_stack_size()
         self._symbol_size_ = js_code.symbol_size()
+        self._locals_size_ = js_code.locals_size()
+        self._has_environment_ = js_code.has_environment()
+        self._has_arguments_object_ = js_code.has_arguments_object()
+        self._environment_layout_ = js_code.environment_layout()
+        self._comparator_ = js_code.numeric_comparator()
 
     def estimated_stack_size(self):
         return self._stack_size_
@@ -110,6 +138,26 @@ class JsExecutableCode(JsBaseFunction):
     def env_size(self):
         return self._symbol_size_
 
+    def locals_size(self):
+        return self._locals_size_
+
+    def has_environment(self):
+        return self._has_environment_
+
+    def has_arguments_object(self):
+        return self._has_arguments_object_
+
+    def environment_layout(self):
+        return self._environment_layout_
+
+    def numeric_comparator(self):
+        return self._comparator_
+
+    @jit.elidable_promote()
+    def local_index(self, name):
+        code = self.get_js_code()
+        return code.local_index(name)
+
     def get_js_code(self):
         from js.jscode import JsCode
         assert isinstance(self._js_code_, JsCode)
@@ -155,12 +203,12 @@ class JsEvalCode(JsExecutableCode):
 
 
 class JsFunction(JsExecutableCode):
-    _immutable_fields_ = ['_js_code_', '_stack_size_', '_symbol_size_', '_name_']
+    _immutable_fields_ = ['_js_code_', '_stack_size_', '_symbol_size_', '_locals_size_', '_has_environment_', '_has_arguments_object_', '_environment_layout_', '_comparator_', '_name_']
 
     def __init__(self, name, js_code):
         assert isinstance(name, unicode)
-        JsExecutableCode.__init__(self, js_code)
         js_code._function_name_ = name
+        JsExecutableCode.__init__(self, js_code)
         self._name_ = name
 
     def name(self):
@@ -0,0 +1,195 @@
+from rpython.rlib import jit
+
+from js.property import is_plain_data_attributes, is_writable_data_attributes
+
+NOT_CACHED = -1
+
+
+class CacheEntry(object):
+    _immutable_fields_ = ['name', 'map', 'holder', 'holder_map', 'index']
+
+    def __init__(self, name, map, holder, holder_map, index):
+        self.name = name
+        self.map = map
+        self.holder = holder
+        self.holder_map = holder_map
+        self.index = index
+
+
+class MemberCache(object):
+    """ Polymorphic inline cache for named property access.
+
+    Each entry maps the receivers Map (and the Map of its prototype for
+    inherited properties) directly to a slot index, so a hit does not walk
+    the Map or the prototype chain and does not allocate a descriptor.
+    """
+    _immutable_fields_ = ['entries?[*]']
+    SIZE = 4
+
+    def __init__(self):
+        self.entries = []
+
+    @jit.unroll_safe
+    def lookup(self, obj, name):
+        _map = jit.promote(obj._property_map_)
+        for entry in self.entries:
+            if entry.map is not _map or entry.name != name:
+                continue
+
+            holder = entry.holder
+            if holder is None:
+                return obj._property_slots_[entry.index]
+            elif obj._prototype_ is holder and jit.promote(holder._property_map_) is entry.holder_map:
+                return holder._property_slots_[entry.index]
+        return None
+
+    @jit.unroll_safe
+    def lookup_own(self, obj, name):
+        _map = jit.promote(obj._property_map_)
+        for entry in self.entries:
+            if entry.map is _map and entry.holder is None and entry.name == name:
+                return entry.index
+        return NOT_CACHED
+
+    def update(self, obj, name, for_store=False):
+        from js.jsobj import W_BasicObject
+
+        if len(self.entries) >= self.SIZE:
+            return
+
+        if not obj._ic_cacheable(name):
+            return
+
+        # the attributes are part of the Map, a Map hit implies them
+        _map = obj._property_map_
+        idx = _map.lookup(name)
+        if not _map.not_found(idx):
+            attrs = _map.lookup_attrs(name)
+            if for_store:
+                cacheable = is_writable_data_attributes(attrs)
+            else:
+                cacheable = is_plain_data_attributes(attrs)
+            if cacheable:
+                self._add_entry(name, _map, None, None, idx)
+            return
+
+        if for_store:
+            return
+
+        proto = obj._prototype_
+        if not isinstance(proto, W_BasicObject) or not proto._ic_cacheable(name):
+            return
+
+        proto_map = proto._property_map_
+        idx = proto_map.lookup(name)
+        if not proto_map.not_found(idx):
+            if is_plain_data_attributes(proto_map.lookup_attrs(name)):
+                self._add_entry(name, _map, proto, proto_map, idx)
+
+    def _add_entry(self, name, _map, holder, holder_map, index):
+        self.entries = self.entries + [CacheEntry(name, _map, holder, holder_map, index)]
+
+
+def load_member(cache, w_obj, w_name):
+    from js.jsobj import W_String
+
+    if not isinstance(w_name, W_String):
+        return w_obj.w_get(w_name)
+
+    name = w_name.to_string()
+    value = cache.lookup(w_obj, name)
+    if value is not None:
+        return value
+
+    value = w_obj.get(name)
+    cache.update(w_obj, name)
+    return value
+
+
+def store_member(cache, w_obj, w_name, value):
+    from js.jsobj import W_String
+
+    if not isinstance(w_name, W_String):
+        w_obj.w_put(w_name, value)
+        return
+
+    name = w_name.to_string()
+    idx = cache.lookup_own(w_obj, name)
+    if idx != NOT_CACHED:
+        w_obj._property_slots_[idx] = value
+        return
+
+    w_obj.put(name, value)
+    cache.update(w_obj, name, for_store=True)
+
+
+class GlobalCache(object):
+    """ Cell of a global variable, see js.jsobj.W_GlobalObject.
+
+    The cell stays the binding of the name as long as the version of the
+    global object did not change. Both only change when a global is deleted
+    or redefined, traces see them as constants. A name that is not defined
+    yet is looked up again until it is, globals are often created after the
+    code using them first ran.
+    """
+    _immutable_fields_ = ['holder?', 'version?', 'cell?']
+
+    def __init__(self):
+        self.holder = None
+        self.version = -1
+        self.cell = None
+
+    def lookup(self, w_global, name):
+        if self.holder is not w_global or self.version != w_global._cells_version_:
+            self.holder = w_global
+            self.version = w_global._cells_version_
+            self.cell = w_global.global_cell(name)
+            return self.cell
+
+        cell = self.cell
+        if cell is None:
+            # only a hit is stored, the fields are quasi-immutable
+            cell = w_global.global_cell(name)
+            if cell is not None:
+                self.cell = cell
+        return cell
+
+
+def _global_object(env_rec):
+    from js.environment_record import ObjectEnvironmentRecord
+    from js.jsobj import W_GlobalObject
+
+    if isinstance(env_rec, ObjectEnvironmentRecord):
+        obj = env_rec.binding_object
+        if isinstance(obj, W_GlobalObject):
+            return jit.promote(obj)
+    return None
+
+
+def load_global(cache, env_rec, name):
+    """ Value of the global variable name if env_rec binds the global
+    object, None if the binding has to be looked up.
+    """
+    w_global = _global_object(env_rec)
+    if w_global is None:
+        return None
+
+    cell = cache.lookup(w_global, name)
+    if cell is None:
+        return None
+    return cell.value
+
+
+def store_global(cache, env_rec, name, value):
+    """ Store value in the global variable name if env_rec binds the
+    global object. Returns False if the binding has to be looked up.
+    """
+    w_global = _global_object(env_rec)
+    if w_global is None:
+        return False
+
+    cell = cache.lookup(w_global, name)
+    if cell is None or cell.writable is not True:
+        return False
+    cell.value = value
+    return True
@@ -7,9 +7,15 @@ def load_file(filename):
     return src
 
 
+# nesting of javascript function calls before a RangeError is thrown, 0
+# leaves it to the host stack, running out of it throws the RangeError
+DEFAULT_MAX_CALL_DEPTH = 0
+
+
 class InterpreterConfig(object):
     def __init__(self, config={}):
         self.debug = config.get('debug', False)
+        self.max_call_depth = config.get('max_call_depth', DEFAULT_MAX_CALL_DEPTH)
 
 
 class Interpreter(object):
@@ -17,12 +23,15 @@ class Interpreter(object):
     def __init__(self, config={}):
         from js.jsobj import W_GlobalObject
         from js.object_space import object_space
+        from js.frame_pool import FramePool
         import js.builtins.interpreter
 
         self.config = InterpreterConfig(config)
         self.global_object = W_GlobalObject()
         object_space.global_object = self.global_object
         object_space.interpreter = self
+        object_space.frame_pool = FramePool()
+        object_space.call_depth = 0
 
         js.builtins.setup_builtins(self.global_object)
         js.builtins.interpreter.setup_builtins(self.global_object)
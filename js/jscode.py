@@ -17,7 +17,9 @@ def get_printable_location(pc, debug, jscode):
     else:
         return '%d: %s' % (pc, 'end of opcodes')
 
-jitdriver = jit.JitDriver(greens=['pc', 'debug', 'self'], reds=['result', 'ctx'], get_printable_location=get_printable_location, virtualizables=['ctx'])
+# ctx is the virtualizable frame of one run, a javascript call runs the code
+# of the callee in a nested run on the host stack, see W__Function.Call
+jitdriver = jit.JitDriver(greens=['pc', 'debug', 'self'], reds=['ctx'], get_printable_location=get_printable_location, virtualizables=['ctx'])
 
 
 def ast_to_bytecode(ast, symbol_map):
@@ -27,6 +29,16 @@ def ast_to_bytecode(ast, symbol_map):
     return bytecode
 
 
+def estimate_stack_size(opcodes):
+    max_size = 0
+    moving_size = 0
+    for opcode in opcodes:
+        moving_size += opcode.stack_change()
+        max_size = max(moving_size, max_size)
+    assert max_size >= 0
+    return max_size
+
+
 class AlreadyRun(Exception):
     pass
 
@@ -51,6 +63,7 @@ class JsCode(object):
         self._symbols = symbol_map
         self.parameters = symbol_map.parameters[:]
         self._function_name_ = None
+        self._comparator_ = 0
 
     def variables(self):
         return self._symbols.variables
@@ -70,19 +83,28 @@ class JsCode(object):
     @jit.elidable
     def estimated_stack_size(self):
         if self._estimated_stack_size == -1:
-            max_size = 0
-            moving_size = 0
-            for opcode in self.compiled_opcodes:
-                moving_size += opcode.stack_change()
-                max_size = max(moving_size, max_size)
-            assert max_size >= 0
-            self._estimated_stack_size = max_size
+            self._estimated_stack_size = estimate_stack_size(self.compiled_opcodes)
 
         return jit.promote(self._estimated_stack_size)
 
     def symbol_size(self):
         return self._symbols.len()
 
+    def local_index(self, symbol):
+        return self._symbols.local_index(symbol)
+
+    def locals_size(self):
+        return self._symbols.locals_count()
+
+    def has_environment(self):
+        return self._symbols.has_environment()
+
+    def has_arguments_object(self):
+        return self._symbols.has_arguments_object()
+
+    def environment_layout(self):
+        return self._symbols.environment_layout()
+
     def emit_label(self, num=-1):
         if num == -1:
             num = self.prealocate_label()
@@ -169,9 +191,51 @@ class JsCode(object):
             self.remove_labels()
 
     def compile(self):
+        from js.peephole import optimize
+        from js.object_space import object_space
         self.unlabel()
-        self.compiled_opcodes = [o for o in self.opcodes]
-        self.estimated_stack_size()
+        opcodes = [o for o in self.opcodes]
+        # the optimized opcodes never use more of the stack than the
+        # emitted ones, the estimate does not depend on dead code
+        self._estimated_stack_size = estimate_stack_size(opcodes)
+        self.compiled_opcodes = optimize(opcodes)
+        self._comparator_ = self._numeric_comparator()
+
+        interpreter = object_space.interpreter
+        if interpreter is not None and interpreter.config.debug:
+            name = self._function_name_
+            if name is None:
+                name = u'code'
+            d = u'peephole %s: %s -> %s opcodes' % (name, unicode(str(len(self.opcodes))), unicode(str(len(self.compiled_opcodes))))
+            print(d)
+
+    def _numeric_comparator(self):
+        """ 1 if the code is function(a, b) { return a - b; }, -1 if it is
+        function(a, b) { return b - a; }, 0 otherwise.
+        """
+        from js.opcodes import LOAD_LOCAL, SUB, RETURN
+        params = self.params()
+        opcodes = self.compiled_opcodes
+        if len(params) < 2 or len(opcodes) < 4:
+            return 0
+        first = self.local_index(params[0])
+        second = self.local_index(params[1])
+        left = opcodes[0]
+        right = opcodes[1]
+        if first == -1 or second == -1 or first == second:
+            return 0
+        if not isinstance(left, LOAD_LOCAL) or not isinstance(right, LOAD_LOCAL):
+            return 0
+        if not isinstance(opcodes[2], SUB) or not isinstance(opcodes[3], RETURN):
+            return 0
+        if left.local == first and right.local == second:
+            return 1
+        if left.local == second and right.local == first:
+            return -1
+        return 0
+
+    def numeric_comparator(self):
+        return self._comparator_
 
     def remove_labels(self):
         """ Basic optimization to remove all labels and change
@@ -205,8 +269,7 @@ class JsCode(object):
     def run(self, ctx):
         from js.object_space import object_space
         debug = object_space.interpreter.config.debug
-        from js.completion import NormalCompletion, is_completion, is_return_completion, is_empty_completion
-        from js.opcodes import BaseJump
+        from js.completion import NormalCompletion
 
         if self._opcode_count() == 0:
             return NormalCompletion()
@@ -215,40 +278,34 @@ class JsCode(object):
             print('start running %s' % (str(self)))
 
         pc = 0
-        result = None
         while True:
-            jitdriver.jit_merge_point(pc=pc, debug=debug, self=self, ctx=ctx, result=result)
+            jitdriver.jit_merge_point(pc=pc, debug=debug, self=self, ctx=ctx)
             if pc >= self._opcode_count():
                 break
             opcode = self._get_opcode(pc)
-            result = opcode.eval(ctx)
 
             if debug:
                 d = u'%s\t%s' % (unicode(str(pc)), unicode(str(opcode)))
                 #d = u'%s' % (unicode(str(pc)))
-                #d = u'%3d %25s %s %s' % (pc, unicode(opcode), unicode([unicode(s) for s in ctx._stack_]), unicode(result))
+                #d = u'%3d %25s %s' % (pc, unicode(opcode), unicode([unicode(s) for s in ctx._stack_]))
                 print(d)
 
-            if is_return_completion(result):
-                break
-            elif not is_completion(result):
-                result = NormalCompletion()
-
-            if isinstance(opcode, BaseJump):
+            if opcode._jump:
                 old_pc = pc
                 pc = opcode.do_jump(ctx, pc)
                 if pc < old_pc:
-                    jitdriver.can_enter_jit(pc=pc, debug=debug, self=self, ctx=ctx, result=result)
+                    jitdriver.can_enter_jit(pc=pc, debug=debug, self=self, ctx=ctx)
                 continue
-            else:
-                pc += 1
 
-        assert is_completion(result)
-        if is_empty_completion(result):
-            result = NormalCompletion(value=ctx.stack_top())
+            # only RETURN and the opcodes running nested code return a
+            # completion
+            completion = opcode.eval(ctx)
+            if completion is not None:
+                return completion
 
-        return result
+            pc += 1
 
+        return NormalCompletion(value=ctx.stack_top())
 
     #def __repr__(self):
         #return "\n".join([repr(i) for i in self.opcodes])
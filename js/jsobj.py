@@ -3,10 +3,12 @@ from rpython.rlib.rarithmetic import intmask
 from rpython.rlib.rfloat import isnan, isinf, NAN, formatd, INFINITY
 from rpython.rlib.objectmodel import enforceargs
 from rpython.rlib import jit, debug
+from rpython.rlib.rstring import UnicodeBuilder
+from rpython.rlib.rstackovf import StackOverflow, check_stack_overflow
 
 from js.property_descriptor import PropertyDescriptor, DataPropertyDescriptor, AccessorPropertyDescriptor, is_data_descriptor, is_generic_descriptor, is_accessor_descriptor
-from js.property import DataProperty, AccessorProperty
-from js.object_map import new_map
+from js.property import DataProperty, AccessorProperty, NOT_SET, is_accessor_attributes, is_plain_data_attributes, is_writable_data_attributes, attr_writable, attr_enumerable, attr_configurable
+from js.object_map import new_map, DICT_MODE_MAP
 from js.exception import JsTypeError, JsRangeError
 
 
@@ -17,6 +19,12 @@ def is_array_index(p):
 
 NOT_ARRAY_INDEX = -1
 
+# number of properties after which an object switches to a dict
+DICT_MODE_SIZE = 128
+# deleting a property other than the last one added from an object with more
+# properties than this switches it to a dict
+DICT_MODE_DELETE_SIZE = 16
+
 
 class Descr(object):
     def __init__(self, can_put, own, inherited, prop):
@@ -26,20 +34,21 @@ class Descr(object):
         self.prop = prop
 
 
-def _get_from_desc(desc, this):
+def _call_getter(getter, this):
     from js.object_space import newundefined
-    if desc is None:
+    if getter is None:
         return newundefined()
+    return getter.Call(this=this)
 
-    if is_data_descriptor(desc):
-        return desc.value
-
-    if desc.has_set_getter() is False:
-        return newundefined()
 
-    getter = desc.getter
-    res = getter.Call(this=this)
-    return res
+def _get_from_prop(prop, this):
+    # [[Get]] of a found property, without creating its descriptor
+    from js.object_space import newundefined
+    if prop.is_data_property():
+        if prop.value is None or prop.writable is NOT_SET:
+            return newundefined()
+        return prop.value
+    return _call_getter(prop.getter, this)
 
 
 @jit.unroll_safe
@@ -196,10 +205,48 @@ class W_ProtoSetter(W_Root):
 
 w_proto_getter = W_ProtoGetter()
 w_proto_setter = W_ProtoSetter()
+# defined once on Object.prototype, see js.builtins.setup_builtins
 proto_desc = AccessorPropertyDescriptor(w_proto_getter, w_proto_setter, False, False)
 jit.promote(proto_desc)
 
 
+class W_AccessorPair(W_Root):
+    """ Getter and setter of an accessor property stored in a slot. """
+    def __init__(self, getter, setter):
+        self.getter = getter
+        self.setter = setter
+
+
+def _slot_to_prop(attrs, value):
+    if is_accessor_attributes(attrs):
+        assert isinstance(value, W_AccessorPair)
+        return AccessorProperty(value.getter, value.setter, attr_enumerable(attrs), attr_configurable(attrs))
+    return DataProperty(value, attr_writable(attrs), attr_enumerable(attrs), attr_configurable(attrs))
+
+
+def _get_from_slot(attrs, value, this):
+    from js.object_space import newundefined
+    if is_accessor_attributes(attrs):
+        assert isinstance(value, W_AccessorPair)
+        return _call_getter(value.getter, this)
+    if value is None or not is_plain_data_attributes(attrs):
+        return newundefined()
+    return value
+
+
+def _slot_to_desc(attrs, value):
+    if is_accessor_attributes(attrs):
+        assert isinstance(value, W_AccessorPair)
+        return AccessorPropertyDescriptor(value.getter, value.setter, attr_enumerable(attrs), attr_configurable(attrs))
+    return DataPropertyDescriptor(value, attr_writable(attrs), attr_enumerable(attrs), attr_configurable(attrs))
+
+
+def _prop_to_slot(prop):
+    if prop.is_accessor_property():
+        return W_AccessorPair(prop.getter, prop.setter)
+    return prop.value
+
+
 def reject(throw, msg=u''):
     if throw:
         raise JsTypeError(msg)
@@ -216,15 +263,19 @@ class W_BasicObject(W_Root):
     _type_ = 'object'
     _class_ = 'Object'
     _extensible_ = True
-    _immutable_fields_ = ['_type_', '_class_']  # TODO why need _primitive_value_ here???
+    # the prototypes traces see as constants, like the ones inline caches
+    # find methods on, rarely change once set up, they are quasi-immutable.
+    # The Map changes whenever a property is added or deleted, reads promote
+    # it instead
+    _immutable_fields_ = ['_type_', '_class_', '_prototype_?']  # TODO why need _primitive_value_ here???
 
     def __init__(self):
         from js.object_space import newnull
         self._property_map_ = new_map()
         self._property_slots_ = debug.make_sure_not_resized([])
+        self._property_dict_ = None
 
         self._prototype_ = newnull()
-        W_BasicObject.define_own_property(self, u'__proto__', proto_desc)
 
     def __str__(self):
         return "%s: %s" % (object.__repr__(self), self.klass())
@@ -243,9 +294,26 @@ class W_BasicObject(W_Root):
     # 8.12.3
     def get(self, p):
         assert p is not None and isinstance(p, unicode)
-        desc = self.get_property(p)
+        value = self._get_own_value(p)
+        if value is not None:
+            return value
 
-        return _get_from_desc(desc, self)
+        return self._get_inherited(p, self)
+
+    @jit.unroll_safe
+    def _get_inherited(self, p, this):
+        # [[Get]] of p on the prototype chain starting at self, reads the
+        # slots without creating descriptors
+        from js.object_space import newundefined
+        obj = self
+        while True:
+            value = obj._get_own(p, this)
+            if value is not None:
+                return value
+            proto = obj.prototype()
+            if not isinstance(proto, W_BasicObject):
+                return newundefined()
+            obj = proto
 
     def w_get(self, w_p):
         name = w_p.to_string()
@@ -255,46 +323,196 @@ class W_BasicObject(W_Root):
     def get_own_property(self, p):
         assert p is not None and isinstance(p, unicode)
 
-        prop = self._get_prop(p)
-        if prop is None:
-            return
+        if self._property_dict_ is not None:
+            prop = self._property_dict_.get(p, None)
+            if prop is None:
+                return None
+            return prop.to_property_descriptor()
 
-        return prop.to_property_descriptor()
+        _map = jit.promote(self._property_map_)
+        idx = _map.lookup(p)
+
+        if _map.not_found(idx):
+            return None
+
+        return _slot_to_desc(_map.lookup_attrs(p), self._property_slots_[idx])
+
+    def _get_own(self, name, this):
+        """ Value of the own property name read for this, getters are
+        called. None if there is no such property.
+        """
+        if self._property_dict_ is not None:
+            prop = self._property_dict_.get(name, None)
+            if prop is None:
+                return None
+            return _get_from_prop(prop, this)
+
+        _map = jit.promote(self._property_map_)
+        idx = _map.lookup(name)
+
+        if _map.not_found(idx):
+            return None
+
+        return _get_from_slot(_map.lookup_attrs(name), self._property_slots_[idx], this)
+
+    def _has_own_property(self, name):
+        if self._property_dict_ is not None:
+            return name in self._property_dict_
+
+        _map = jit.promote(self._property_map_)
+        return not _map.not_found(_map.lookup(name))
 
     def _get_prop(self, name):
-        idx = self._property_map_.lookup(name)
+        # Property view of an own property, allocates for properties stored in
+        # slots. Use _get_own_value and _put_own_value on fast paths.
+        if self._property_dict_ is not None:
+            return self._property_dict_.get(name, None)
 
-        if self._property_map_.not_found(idx):
+        _map = jit.promote(self._property_map_)
+        idx = _map.lookup(name)
+
+        if _map.not_found(idx):
             return
 
-        prop = self._property_slots_[idx]
-        return prop
+        return _slot_to_prop(_map.lookup_attrs(name), self._property_slots_[idx])
+
+    def _get_own_value(self, name):
+        """ Value of the own data property name, None if there is none. """
+        if self._property_dict_ is not None:
+            prop = self._property_dict_.get(name, None)
+            if isinstance(prop, DataProperty) and prop.writable is not NOT_SET:
+                return prop.value
+            return None
+
+        _map = jit.promote(self._property_map_)
+        idx = _map.lookup(name)
+
+        if _map.not_found(idx):
+            return None
+
+        if not is_plain_data_attributes(_map.lookup_attrs(name)):
+            return None
+
+        return self._property_slots_[idx]
+
+    def _put_own_value(self, name, value):
+        """ Store value in the own writable data property name.
+
+        Returns False if there is no such property, the caller has to take
+        the [[Put]] path then.
+        """
+        if self._property_dict_ is not None:
+            prop = self._property_dict_.get(name, None)
+            if isinstance(prop, DataProperty) and prop.writable is True:
+                prop.value = value
+                return True
+            return False
+
+        _map = jit.promote(self._property_map_)
+        idx = _map.lookup(name)
+
+        if _map.not_found(idx):
+            return False
+
+        if not is_writable_data_attributes(_map.lookup_attrs(name)):
+            return False
+
+        self._property_slots_[idx] = value
+        return True
 
     def _del_prop(self, name):
-        idx = self._property_map_.lookup(name)
+        if self._property_dict_ is not None:
+            if name in self._property_dict_:
+                del self._property_dict_[name]
+            return
 
-        if self._property_map_.not_found(idx):
+        _map = self._property_map_
+        idx = _map.lookup(name)
+
+        if _map.not_found(idx):
             return
 
         assert idx >= 0
-        self._property_slots_ = self._property_slots_[:idx] + self._property_slots_[idx + 1:]
-        self._property_map_ = self._property_map_.delete(name)
+        last = _map.index
+        if idx == last:
+            self._property_slots_[idx] = None
+            self._property_map_ = _map.back
+            return
 
-    def _add_prop(self, name, value):
+        if _map.len() > DICT_MODE_DELETE_SIZE:
+            self._to_dict_mode()
+            del self._property_dict_[name]
+            return
+
+        slots = self._property_slots_
+        for i in range(idx, last):
+            slots[i] = slots[i + 1]
+        slots[last] = None
+        self._property_map_ = _map.delete(name)
+
+    def _add_prop(self, name, prop):
+        if self._property_dict_ is not None:
+            self._property_dict_[name] = prop
+            return
+
+        attrs = prop.attributes()
         idx = self._property_map_.lookup(name)
 
         if self._property_map_.not_found(idx):
-            self._property_map_ = self._property_map_.add(name)
+            if self._property_map_.len() >= DICT_MODE_SIZE:
+                self._to_dict_mode()
+                self._property_dict_[name] = prop
+                return
+
+            self._property_map_ = self._property_map_.add(name, attrs)
             idx = self._property_map_.index
+        elif self._property_map_.lookup_attrs(name) != attrs:
+            self._property_map_ = self._property_map_.set_attrs(name, attrs)
 
-        if idx >= len(self._property_slots_):
-            self._property_slots_ = self._property_slots_ + ([None] * (1 + idx - len(self._property_slots_)))
+        size = len(self._property_slots_)
+        if idx >= size:
+            # over-allocate to make adding n properties O(n)
+            new_size = max(idx + 1, size * 2)
+            self._property_slots_ = self._property_slots_ + [None] * (new_size - size)
 
-        self._property_slots_[idx] = value
+        self._property_slots_[idx] = _prop_to_slot(prop)
 
-    def _set_prop(self, name, value):
-        idx = self._property_map_.lookup(name)
-        self._property_slots_[idx] = value
+    def _set_prop(self, name, prop):
+        if self._property_dict_ is not None:
+            self._property_dict_[name] = prop
+            return
+
+        attrs = prop.attributes()
+        _map = self._property_map_
+        idx = _map.lookup(name)
+        if _map.lookup_attrs(name) != attrs:
+            self._property_map_ = _map.set_attrs(name, attrs)
+        self._property_slots_[idx] = _prop_to_slot(prop)
+
+    def _to_dict_mode(self):
+        # objects used as hash tables, with many or frequently deleted keys,
+        # store their properties in a dict instead of creating a Map for
+        # every key set
+        _map = self._property_map_
+        d = {}
+        for name in _map.keys():
+            d[name] = _slot_to_prop(_map.lookup_attrs(name), self._property_slots_[_map.lookup(name)])
+
+        self._property_dict_ = d
+        self._property_map_ = DICT_MODE_MAP
+        self._property_slots_ = debug.make_sure_not_resized([])
+
+    def _property_names(self):
+        if self._property_dict_ is not None:
+            return self._property_dict_.keys()
+        return self._property_map_.keys()
+
+    def _ic_cacheable(self, name):
+        # names handled outside of the property map must not be cached by
+        # js.inline_cache.MemberCache
+        if self._property_dict_ is not None:
+            return False
+        return not is_array_index(name)
 
     # 8.12.2
     def get_property(self, p):
@@ -316,6 +534,9 @@ class W_BasicObject(W_Root):
     def put(self, p, v, throw=False):
         assert p is not None and isinstance(p, unicode)
 
+        if self._put_own_value(p, v):
+            return
+
         if not self.can_put(p):
             if throw:
                 raise JsTypeError(u"can't put %s" % (p, ))
@@ -375,13 +596,18 @@ class W_BasicObject(W_Root):
                 return inherited.writable
 
     # 8.12.6
+    @jit.unroll_safe
     def has_property(self, p):
         assert p is not None and isinstance(p, unicode)
 
-        desc = self.get_property(p)
-        if desc is None:
-            return False
-        return True
+        obj = self
+        while True:
+            if obj._has_own_property(p):
+                return True
+            proto = obj.prototype()
+            if not isinstance(proto, W_BasicObject):
+                return False
+            obj = proto
 
     # 8.12.7
     def delete(self, p, throw=False):
@@ -519,6 +745,7 @@ class W_BasicObject(W_Root):
         # 12
         prop = self._get_prop(p)
         prop.update_with_descriptor(desc)
+        self._set_prop(p, prop)
 
         # 13
         return True
@@ -546,7 +773,7 @@ class W_BasicObject(W_Root):
     def _named_properties_dict(self):
         from js.object_space import isnull_or_undefined
         my_d = {}
-        for i in self._property_map_.keys():
+        for i in self._property_names():
             my_d[i] = None
 
         proto = self.prototype()
@@ -606,20 +833,36 @@ class W_StringObject(W__PrimitiveObject):
         if desc is not None:
             return desc
 
+        char = self._char_at(p)
+        if char is None:
+            return None
+        return PropertyDescriptor(value=char, enumerable=True, writable=False, configurable=False)
+
+    def _get_own(self, name, this):
+        value = W__PrimitiveObject._get_own(self, name, this)
+        if value is not None:
+            return value
+        return self._char_at(name)
+
+    def _has_own_property(self, name):
+        if W__PrimitiveObject._has_own_property(self, name):
+            return True
+        return self._char_at(name) is not None
+
+    def _char_at(self, p):
+        # the characters are read only index properties
         if not is_array_index(p):
             return None
 
-        string = self.to_string()
+        string = self._primitive_value_.to_string()
         index = int(p)
         length = len(string)
 
         if length <= index:
             return None
 
-        result_string = string[index]
         from js.object_space import _w
-        d = PropertyDescriptor(value=_w(result_string), enumerable=True, writable=False, configurable=False)
-        return d
+        return _w(string[index])
 
 
 class W__Object(W_BasicObject):
@@ -627,7 +870,40 @@ class W__Object(W_BasicObject):
 
 
 class W_GlobalObject(W__Object):
+    """ Its properties always stay in the dict, their Property objects are
+    the cells of the global variables js.inline_cache.GlobalCache caches.
+
+    _cells_version_ changes whenever a cell stops being the property of its
+    name, that is when it is deleted or redefined.
+    """
     _class_ = 'global'
+    _immutable_fields_ = ['_cells_version_?']
+
+    def __init__(self):
+        W__Object.__init__(self)
+        self._property_dict_ = {}
+        self._property_map_ = DICT_MODE_MAP
+        self._cells_version_ = 0
+
+    def _add_prop(self, name, prop):
+        if name in self._property_dict_:
+            self._cells_version_ += 1
+        W__Object._add_prop(self, name, prop)
+
+    def _set_prop(self, name, prop):
+        self._cells_version_ += 1
+        W__Object._set_prop(self, name, prop)
+
+    def _del_prop(self, name):
+        self._cells_version_ += 1
+        W__Object._del_prop(self, name)
+
+    def global_cell(self, name):
+        """ The property of name if it is a data property, None otherwise. """
+        prop = self._property_dict_.get(name, None)
+        if isinstance(prop, DataProperty) and prop.writable is not NOT_SET:
+            return prop
+        return None
 
 
 class W_DateObject(W__PrimitiveObject):
@@ -908,21 +1184,41 @@ class W__Function(W_BasicFunction):
     def Call(self, args=[], this=None, calling_context=None):
         from js.execution_context import FunctionExecutionContext
         from js.completion import Completion
+        from js.object_space import object_space
 
         code = self.code()
         jit.promote(code)
         strict = self._strict_
         scope = self.scope()
 
+        # the calls recurse on the host stack, there is no frame stack of
+        # their own, only their depth is bounded, see InterpreterConfig
+        max_call_depth = object_space.interpreter.config.max_call_depth
+        if max_call_depth > 0 and object_space.call_depth >= max_call_depth:
+            raise JsRangeError(u'Maximum call stack size exceeded')
+
+        pool = object_space.frame_pool
         ctx = FunctionExecutionContext(code,
                                        argv=args,
                                        this=this,
                                        strict=strict,
                                        scope=scope,
-                                       w_func=self)
+                                       w_func=self,
+                                       pool=pool)
         ctx._calling_context_ = calling_context
 
-        res = code.run(ctx)
+        object_space.call_depth += 1
+        try:
+            try:
+                res = code.run(ctx)
+            except StackOverflow:
+                check_stack_overflow()
+                raise JsRangeError(u'Maximum call stack size exceeded')
+        finally:
+            object_space.call_depth -= 1
+            # nothing keeps a finished context, closures only capture its
+            # environment, this holds for calls that raised as well
+            ctx.release_to(pool)
 
         assert isinstance(res, Completion)
         return res.value
@@ -941,6 +1237,21 @@ class W__Function(W_BasicFunction):
         return self._strict_
 
 
+class W_NativeFunction(W__Function):
+    """ A builtin implemented by a JsNativeFunction, it only needs this and
+    the arguments so it is called without an execution context.
+    """
+    def Call(self, args=[], this=None, calling_context=None):
+        from js.functions import JsNativeFunction
+        from js.execution_context import native_this_binding
+
+        code = self.code()
+        assert isinstance(code, JsNativeFunction)
+        jit.promote(code)
+        this = native_this_binding(this)
+        return code.call(this, args)
+
+
 # 10.6
 class W_Arguments(W__Object):
     _class_ = 'Arguments'
@@ -1075,7 +1386,7 @@ class W_String(W_Primitive):
         return self.to_string() == other_string
 
     def __str__(self):
-        return u'W_String("%s")' % (self._strval_)
+        return u'W_String("%s")' % (self.to_string())
 
     def ToObject(self):
         from js.object_space import object_space
@@ -1084,8 +1395,17 @@ class W_String(W_Primitive):
     def to_string(self):
         return self._strval_
 
+    def length(self):
+        return len(self._strval_)
+
+    def rope_depth(self):
+        return 0
+
+    def is_lazy(self):
+        return False
+
     def to_boolean(self):
-        if len(self._strval_) == 0:
+        if self.length() == 0:
             return False
         else:
             return True
@@ -1095,7 +1415,7 @@ class W_String(W_Primitive):
         from js.runistr import encode_unicode_utf8
         from js.constants import hex_rexp, oct_rexp, num_rexp
 
-        u_strval = self._strval_
+        u_strval = self.to_string()
 
         u_strval = _strip(u_strval)
         s = encode_unicode_utf8(u_strval)
@@ -1135,6 +1455,136 @@ class W_String(W_Primitive):
         return NAN
 
 
+# concatenations shorter than this are done eagerly
+ROPE_MIN_LENGTH = 32
+# ropes deeper than this are flattened right away, so that no caller has to
+# walk a deep tree
+ROPE_MAX_DEPTH = 32
+
+
+def _flatten(w_str, length):
+    builder = UnicodeBuilder(length)
+    stack = [w_str]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, W_ConcatString) and node._flat_ is None:
+            stack.append(node._right_)
+            stack.append(node._left_)
+        else:
+            builder.append(node.to_string())
+    return builder.build()
+
+
+class W_ConcatString(W_String):
+    """ String built by concatenation, flattened on first use of its value.
+
+    Used when an operand is still lazy and can not be appended to, like
+    when a string is built from the front. Its depth is bounded by
+    ROPE_MAX_DEPTH, see concat_strings.
+    """
+    _immutable_fields_ = ['_length_', '_depth_']
+
+    def __init__(self, left, right):
+        self._left_ = left
+        self._right_ = right
+        self._length_ = left.length() + right.length()
+        self._depth_ = max(left.rope_depth(), right.rope_depth()) + 1
+        self._flat_ = None
+
+    def to_string(self):
+        flat = self._flat_
+        if flat is None:
+            flat = _flatten(self, self._length_)
+            self._flat_ = flat
+            self._left_ = None
+            self._right_ = None
+        return flat
+
+    def length(self):
+        return self._length_
+
+    def rope_depth(self):
+        if self._flat_ is not None:
+            return 0
+        return self._depth_
+
+    def is_lazy(self):
+        return self._flat_ is None
+
+
+class StringBuffer(object):
+    """ Pieces shared by the W_AppendString objects built on top of each
+    other, each of them is a prefix of it.
+    """
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+
+class W_AppendString(W_String):
+    """ String made of the first pieces of a StringBuffer.
+
+    The longest string of a buffer owns it, appending to it adds a piece in
+    place, so s += piece copies every piece once, when the value is used.
+    Once flattened the string lets go of the buffer, appending to it then
+    starts a new one.
+    """
+    _immutable_fields_ = ['_count_', '_length_']
+
+    def __init__(self, buffer, count, length):
+        self._buffer_ = buffer
+        self._count_ = count
+        self._length_ = length
+        self._flat_ = None
+
+    def owns_buffer(self):
+        buffer = self._buffer_
+        return buffer is not None and self._count_ == len(buffer.pieces)
+
+    def append(self, w_right):
+        buffer = self._buffer_
+        assert buffer is not None
+        buffer.pieces.append(w_right.to_string())
+        return W_AppendString(buffer, self._count_ + 1, self._length_ + w_right.length())
+
+    def to_string(self):
+        flat = self._flat_
+        if flat is None:
+            buffer = self._buffer_
+            assert buffer is not None
+            builder = UnicodeBuilder(self._length_)
+            for i in range(self._count_):
+                builder.append(buffer.pieces[i])
+            flat = builder.build()
+            self._flat_ = flat
+            self._buffer_ = None
+        return flat
+
+    def length(self):
+        return self._length_
+
+    def is_lazy(self):
+        return self._flat_ is None
+
+
+def concat_strings(w_left, w_right):
+    assert isinstance(w_left, W_String)
+    assert isinstance(w_right, W_String)
+    if w_left.length() + w_right.length() < ROPE_MIN_LENGTH:
+        return W_String(w_left.to_string() + w_right.to_string())
+
+    if isinstance(w_left, W_AppendString) and w_left.owns_buffer():
+        return w_left.append(w_right)
+    if w_left.is_lazy() or w_right.is_lazy():
+        # flattening here would copy on every step of a loop building the
+        # string some other way
+        w_str = W_ConcatString(w_left, w_right)
+        if w_str.rope_depth() > ROPE_MAX_DEPTH:
+            w_str.to_string()
+        return w_str
+    buffer = StringBuffer([w_left.to_string(), w_right.to_string()])
+    return W_AppendString(buffer, 2, w_left.length() + w_right.length())
+
+
 class W_Number(W_Primitive):
     """ Base class for numbers, both known to be floats
     and those known to be integers
@@ -1259,17 +1709,6 @@ class W_FloatNumber(W_Number):
         return intmask(int(self._floatval_))
 
 
-class W_List(W_Root):
-    def __init__(self, values):
-        self.values = values
-
-    def to_list(self):
-        return self.values
-
-    def __str__(self):
-        return 'W_List(%s)' % (unicode([unicode(v) for v in self.values]))
-
-
 class W_Iterator(W_Root):
     def __init__(self, elements_w):
         self.elements_w = elements_w
@@ -1291,8 +1730,9 @@ class W__Array(W_BasicObject):
     _class_ = 'Array'
 
     def __init__(self, length=w_0):
-        self._array_props_ = {}
-        #self._array_props_ = []
+        from js.array_strategies import empty_strategy
+        self._array_strategy_ = empty_strategy
+        empty_strategy.init_storage(self)
 
         W_BasicObject.__init__(self)
         assert isinstance(length, W_Root)
@@ -1310,7 +1750,7 @@ class W__Array(W_BasicObject):
 
     def _add_iprop(self, idx, value):
         assert isinstance(idx, int)
-        self._array_props_[idx] = value
+        self._array_strategy_.set_prop(self, idx, value)
 
     def _get_prop(self, name):
         idx = make_array_index(name)
@@ -1322,7 +1762,7 @@ class W__Array(W_BasicObject):
     def _get_iprop(self, idx):
         assert isinstance(idx, int)
         assert idx >= 0
-        return self._array_props_.get(idx, None)
+        return self._array_strategy_.get_prop(self, idx)
 
     def _set_prop(self, name, value):
         idx = make_array_index(name)
@@ -1334,7 +1774,7 @@ class W__Array(W_BasicObject):
     def _set_iprop(self, idx, value):
         assert isinstance(idx, int)
         assert idx >= 0
-        self._array_props_[idx] = value
+        self._array_strategy_.set_prop(self, idx, value)
 
     def _del_prop(self, name):
         idx = make_array_index(name)
@@ -1343,21 +1783,38 @@ class W__Array(W_BasicObject):
         else:
             W_BasicObject._del_prop(self, name)
 
+    def _ic_cacheable(self, name):
+        if name == u'length':
+            return False
+        return W_BasicObject._ic_cacheable(self, name)
+
+    def _get_own_value(self, name):
+        idx = make_array_index(name)
+        if idx != NOT_ARRAY_INDEX:
+            return self._array_strategy_.getitem(self, idx)
+        return W_BasicObject._get_own_value(self, name)
+
+    def _put_own_value(self, name, value):
+        # length has to go through define_own_property
+        if name == u'length':
+            return False
+        idx = make_array_index(name)
+        if idx != NOT_ARRAY_INDEX:
+            return self._array_strategy_.setitem(self, idx, value)
+        return W_BasicObject._put_own_value(self, name, value)
+
     def _del_iprop(self, idx):
         assert isinstance(idx, int)
         assert idx >= 0
-        try:
-            del self._array_props_[idx]
-        except KeyError:
-            pass
+        self._array_strategy_.delete(self, idx)
 
     def _named_properties_dict(self):
         from js.object_space import isnull_or_undefined
         my_d = {}
-        for i in self._array_props_.keys():
+        for i in self._array_strategy_.indexes(self):
             my_d[unicode(str(i))] = None
 
-        for i in self._property_map_.keys():
+        for i in self._property_names():
             my_d[i] = None
 
         proto = self.prototype()
@@ -1393,15 +1850,66 @@ class W__Array(W_BasicObject):
         if isinstance(w_p, W_IntNumber):
             idx = w_p.ToInteger()
             if idx >= 0:
-                desc = self._get_idx_property(idx)
-                return _get_from_desc(desc, self)
+                value = self._array_strategy_.getitem(self, idx)
+                if value is not None:
+                    return value
+                return self._get_idx_inherited(idx)
 
         return W_BasicObject.w_get(self, w_p)
 
+    @jit.unroll_safe
+    def _get_idx_inherited(self, idx):
+        from js.object_space import newundefined
+        obj = self
+        while isinstance(obj, W__Array):
+            value = obj._get_own_idx(idx, self)
+            if value is not None:
+                return value
+            obj = obj.prototype()
+
+        if isinstance(obj, W_BasicObject):
+            return obj._get_inherited(unicode(str(idx)), self)
+        return newundefined()
+
+    def _get_own_idx(self, idx, this):
+        value = self._array_strategy_.getitem(self, idx)
+        if value is not None:
+            return value
+        # only the dict strategy has elements that are not plain values
+        prop = self._array_strategy_.get_prop(self, idx)
+        if prop is None:
+            return None
+        return _get_from_prop(prop, this)
+
+    def get_own_property(self, p):
+        idx = make_array_index(p)
+        if idx != NOT_ARRAY_INDEX:
+            prop = self._get_iprop(idx)
+            if prop is None:
+                return None
+            return prop.to_property_descriptor()
+        return W_BasicObject.get_own_property(self, p)
+
+    def _get_own(self, name, this):
+        idx = make_array_index(name)
+        if idx != NOT_ARRAY_INDEX:
+            return self._get_own_idx(idx, this)
+        return W_BasicObject._get_own(self, name, this)
+
+    def _has_own_property(self, name):
+        idx = make_array_index(name)
+        if idx != NOT_ARRAY_INDEX:
+            if self._array_strategy_.getitem(self, idx) is not None:
+                return True
+            return self._array_strategy_.get_prop(self, idx) is not None
+        return W_BasicObject._has_own_property(self, name)
+
     def w_put(self, w_p, v, throw=False):
         if isinstance(w_p, W_IntNumber):
             idx = w_p.ToInteger()
             if idx >= 0:
+                if self._array_strategy_.setitem(self, idx, v):
+                    return
                 self._idx_put(idx, v, throw)
                 return
 
@@ -1416,7 +1924,7 @@ class W__Array(W_BasicObject):
 
         if not can_put:
             if throw:
-                raise JsTypeError(u"can't put %s" % (str(idx), ))
+                raise JsTypeError(u"can't put %d" % (idx, ))
             else:
                 return
 
@@ -1600,6 +2108,7 @@ class W__Array(W_BasicObject):
         # 12
         prop = self._get_iprop(idx)
         prop.update_with_descriptor(desc)
+        self._set_iprop(idx, prop)
 
         # 13
         return True
@@ -3,13 +3,15 @@ from rpython.rlib import jit
 
 class Map(object):
     NOT_FOUND = -1
-    _immutable_fields_ = ['index', 'back', 'name']
+    _immutable_fields_ = ['index', 'back', 'name', 'attrs']
 
     def __init__(self):
         self.index = self.NOT_FOUND
         self.forward_pointers = {}
         self.back = None
         self.name = None
+        self.attrs = 0
+        self._index_table_ = None
 
     def __repr__(self):
         return "%(back)s, [%(index)d]:%(name)s" % \
@@ -26,19 +28,46 @@ class Map(object):
 
     @jit.elidable_promote("0")
     def lookup(self, name):
-        node = self._find_node_with_name(name)
-        if node is not None:
-            return node.index
-        return self.NOT_FOUND
+        table = self._get_index_table()
+        idx = table.indexes.get(name, self.NOT_FOUND)
+        # the table may be shared with descendants of this node, their names
+        # have a higher index
+        if idx > self.index:
+            return self.NOT_FOUND
+        return idx
 
-    def _find_node_with_name(self, name):
-        if self.name == name:
-            return self
-        if self.back is not None:
-            return self.back._find_node_with_name(name)
+    @jit.elidable_promote("0")
+    def lookup_attrs(self, name):
+        # only valid if name is contained in this map
+        table = self._get_index_table()
+        return table.attrs[name]
+
+    def _get_index_table(self):
+        if self._index_table_ is None:
+            self._build_index_table()
+        return self._index_table_
+
+    def _build_index_table(self):
+        # find the closest ancestor that already has a table, iteratively to
+        # not recurse once per property on long transition chains
+        path = []
+        node = self
+        while node._index_table_ is None and node.back is not None:
+            path.append(node)
+            node = node.back
+
+        table = node._index_table_
+        if table is None:
+            table = IndexTable(node)
+            node._index_table_ = table
+
+        path.reverse()
+        for n in path:
+            table = table.extend(n.back, n)
+            n._index_table_ = table
 
     def _key(self):
-        return (self.name)
+        return (self.name, self.attrs)
 
     def empty(self):
         return True
@@ -48,11 +77,11 @@ class Map(object):
         return self.index + 1
 
     @jit.elidable
-    def add(self, name):
+    def add(self, name, attrs=0):
         assert self.lookup(name) == self.NOT_FOUND
-        node = self.forward_pointers.get((name), None)
+        node = self.forward_pointers.get((name, attrs), None)
         if node is None:
-            node = MapNode(self, name)
+            node = MapNode(self, name, attrs)
             self.forward_pointers[node._key()] = node
         return node
 
@@ -70,6 +99,43 @@ class Map(object):
     def delete(self, key):
         return self
 
+    def set_attrs(self, key, attrs):
+        return self
+
+
+class IndexTable(object):
+    """ name -> index and name -> attributes table of a Map.
+
+    A table is shared along a single transition chain, only the last Map of
+    that chain (the owner) may add names to it. Other transitions copy the
+    part of the table that is visible to them.
+    """
+    def __init__(self, owner, indexes=None, attrs=None):
+        self.owner = owner
+        if indexes is None:
+            indexes = {}
+        if attrs is None:
+            attrs = {}
+        self.indexes = indexes
+        self.attrs = attrs
+
+    def extend(self, back, node):
+        if self.owner is back:
+            table = self
+        else:
+            indexes = {}
+            attrs = {}
+            for name, idx in self.indexes.items():
+                if idx <= back.index:
+                    indexes[name] = idx
+                    attrs[name] = self.attrs[name]
+            table = IndexTable(back, indexes, attrs)
+
+        table.indexes[node.name] = node.index
+        table.attrs[node.name] = node.attrs
+        table.owner = node
+        return table
+
 
 class MapRoot(Map):
     def __repr__(self):
@@ -77,10 +143,11 @@ class MapRoot(Map):
 
 
 class MapNode(Map):
-    def __init__(self, back, name):
+    def __init__(self, back, name, attrs=0):
         Map.__init__(self)
         self.back = back
         self.name = name
+        self.attrs = attrs
         self.index = back.index + 1
 
     @jit.elidable
@@ -89,7 +156,16 @@ class MapNode(Map):
             return self.back
         else:
             n = self.back.delete(name)
-            return n.add(self.name)
+            return n.add(self.name, self.attrs)
+
+    @jit.elidable
+    def set_attrs(self, name, attrs):
+        # keeps the index of every name
+        if self.name == name:
+            return self.back.add(name, attrs)
+        else:
+            n = self.back.set_attrs(name, attrs)
+            return n.add(self.name, self.attrs)
 
     def empty(self):
         return False
@@ -97,6 +173,9 @@ class MapNode(Map):
 
 ROOT_MAP = MapRoot()
 
+# Map of objects that keep their properties in a dict, it is never extended
+DICT_MODE_MAP = MapRoot()
+
 
 def new_map():
     return ROOT_MAP
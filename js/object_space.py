@@ -1,6 +1,8 @@
 from rpython.rlib.objectmodel import specialize, enforceargs
 from rpython.rlib import jit
 
+from js.frame_pool import FramePool
+
 
 def isint(w):
     from js.jsobj import W_IntNumber
@@ -133,12 +135,16 @@ class ObjectSpace(object):
         self.proto_date = newnull()
         self.proto_object = newnull()
         self.interpreter = None
+        self.frame_pool = FramePool()
+        # javascript function calls currently running, see W__Function.Call
+        self.call_depth = 0
 
     def get_global_environment(self):
         return self.global_context.variable_environment()
 
     def assign_proto(self, obj, proto=None):
-        from js.jsobj import W_BasicFunction, W_DateObject, W_BooleanObject, W_StringObject, W_NumericObject, W__Array
+        from js.jsobj import W_BasicObject, W_BasicFunction, W_DateObject, W_BooleanObject, W_StringObject, W_NumericObject, W__Array
+        assert isinstance(obj, W_BasicObject)
         if proto is not None:
             obj._prototype_ = proto
             return obj
@@ -171,6 +177,12 @@ class ObjectSpace(object):
         self.assign_proto(obj)
         return obj
 
+    def new_native_func(self, function_body, formal_parameter_list=[]):
+        from js.jsobj import W_NativeFunction
+        obj = W_NativeFunction(function_body, formal_parameter_list)
+        self.assign_proto(obj)
+        return obj
+
     def new_date(self, value):
         from js.jsobj import W_DateObject
         obj = W_DateObject(value)
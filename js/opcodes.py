@@ -3,20 +3,25 @@ from rpython.rlib import jit
 
 from js.object_space import _w, isint
 from js.exception import JsTypeError
-from js.baseop import plus, sub, AbstractEC, StrictEC, increment, decrement, mult, division, uminus, mod
+from js.baseop import plus, sub, AbstractEC, StrictEC, increment, decrement, mult, division, uminus, mod, plus_int, sub_int, mult_int
 from js.jsobj import put_property
+from js.inline_cache import MemberCache, load_member, store_member, GlobalCache, load_global, store_global
 
 
 class Opcode(object):
     _settled_ = True
     _immutable_fields_ = ['_stack_change', 'funcobj']
     _stack_change = 1
+    _jump = False
 
     def __init__(self):
         pass
 
     def eval(self, ctx):
         """ Execute in context ctx
+
+        Returns None, or a ReturnCompletion if the running code has to
+        stop.
         """
         raise NotImplementedError
 
@@ -62,6 +67,119 @@ class BaseBinaryOperation(Opcode):
         ctx.stack_append(self.operation(ctx, left, right))
 
 
+# the operand types a quickened opcode has seen so far, see operand_kind
+UNSEEN = 0
+INT = 1
+FLOAT = 2
+STRING = 3
+GENERIC = 4
+
+
+def operand_kind(kind, left, right):
+    """ The kind of a quickened opcode of kind kind after it saw left and
+    right.
+
+    Int operands widen an opcode seen with floats to FLOAT, any other mix
+    of types makes it GENERIC for good.
+    """
+    from js.jsobj import W_IntNumber, W_Number, W_String
+    if isinstance(left, W_IntNumber) and isinstance(right, W_IntNumber):
+        seen = INT
+    elif isinstance(left, W_Number) and isinstance(right, W_Number):
+        seen = FLOAT
+    elif isinstance(left, W_String) and isinstance(right, W_String):
+        seen = STRING
+    else:
+        return GENERIC
+
+    if kind == UNSEEN or kind == seen:
+        return seen
+    if (kind == INT or kind == FLOAT) and (seen == INT or seen == FLOAT):
+        return FLOAT
+    return GENERIC
+
+
+class BaseQuickenedOperation(BaseBinaryOperation):
+    """ Binary operation that specializes itself on the operands it sees.
+
+    After the first evaluation the operation takes the fast path for the
+    kind of operands it saw, without converting them to primitives. A type
+    miss widens the kind, down to the generic operation.
+    """
+    _immutable_fields_ = ['kind?']
+
+    def __init__(self):
+        self.kind = UNSEEN
+
+    def operation(self, ctx, left, right):
+        from js.jsobj import W_IntNumber, W_Number, W_String
+        kind = self.kind
+        if kind == INT:
+            if isinstance(left, W_IntNumber) and isinstance(right, W_IntNumber):
+                return self.int_operation(left.ToInteger(), right.ToInteger())
+        elif kind == FLOAT:
+            if isinstance(left, W_Number) and isinstance(right, W_Number):
+                return self.float_operation(left.ToNumber(), right.ToNumber())
+        elif kind == STRING:
+            if isinstance(left, W_String) and isinstance(right, W_String):
+                return self.string_operation(ctx, left, right)
+
+        if kind != GENERIC:
+            self.kind = operand_kind(kind, left, right)
+        return self.generic_operation(ctx, left, right)
+
+    def int_operation(self, ileft, iright):
+        raise NotImplementedError
+
+    def float_operation(self, fleft, fright):
+        raise NotImplementedError
+
+    def string_operation(self, ctx, left, right):
+        return self.generic_operation(ctx, left, right)
+
+    def generic_operation(self, ctx, left, right):
+        raise NotImplementedError
+
+
+class BaseQuickenedComparison(BaseBinaryComparison):
+    """ Relational comparison that specializes itself on the operands it
+    sees, see BaseQuickenedOperation.
+    """
+    _immutable_fields_ = ['kind?']
+
+    def __init__(self):
+        self.kind = UNSEEN
+
+    def decision(self, op1, op2):
+        from js.jsobj import W_IntNumber, W_Number, W_String
+        kind = self.kind
+        if kind == INT:
+            if isinstance(op1, W_IntNumber) and isinstance(op2, W_IntNumber):
+                return self.int_decision(op1.ToInteger(), op2.ToInteger())
+        elif kind == FLOAT:
+            if isinstance(op1, W_Number) and isinstance(op2, W_Number):
+                return self.float_decision(op1.ToNumber(), op2.ToNumber())
+        elif kind == STRING:
+            if isinstance(op1, W_String) and isinstance(op2, W_String):
+                return self.string_decision(op1.to_string(), op2.to_string())
+
+        if kind != GENERIC:
+            self.kind = operand_kind(kind, op1, op2)
+        return self.generic_decision(op1, op2)
+
+    def int_decision(self, ileft, iright):
+        raise NotImplementedError
+
+    def float_decision(self, fleft, fright):
+        raise NotImplementedError
+
+    def string_decision(self, sleft, sright):
+        raise NotImplementedError
+
+    def generic_decision(self, op1, op2):
+        raise NotImplementedError
+
+
 class BaseUnaryOperation(Opcode):
     _stack_change = 0
 
@@ -138,24 +256,107 @@ class LOAD_NULL(Opcode):
 
 
 class LOAD_VARIABLE(Opcode):
-    _immutable_fields_ = ['identifier', 'index']
+    _immutable_fields_ = ['identifier', 'index', 'cache']
 
     def __init__(self, index, identifier):
         assert index is not None
         self.index = index
         self.identifier = identifier
+        self.cache = GlobalCache()
 
     # 11.1.2
     def eval(self, ctx):
         # TODO put ref onto stack
         ref = ctx.get_ref(self.identifier, self.index)
-        value = ref.get_value(self.identifier)
+        value = load_global(self.cache, ref.base_env, self.identifier)
+        if value is None:
+            value = ref.get_value(self.identifier)
         ctx.stack_append(value)
 
     def __str__(self):
         return 'LOAD_VARIABLE "%s" (%d)' % (self.identifier, self.index)
 
 
+class LOAD_SCOPED(Opcode):
+    """ Load the binding at slot of the declarative environment depth
+    levels up the scope chain, as resolved by js.symbol_map.
+    """
+    _immutable_fields_ = ['depth', 'slot', 'identifier']
+
+    def __init__(self, depth, slot, identifier):
+        self.depth = depth
+        self.slot = slot
+        self.identifier = identifier
+
+    def eval(self, ctx):
+        env = ctx.lexical_environment_at(self.depth)
+        value = env.environment_record.get_binding_value_at(self.slot)
+        ctx.stack_append(value)
+
+    def __str__(self):
+        return 'LOAD_SCOPED "%s" (%d, %d)' % (self.identifier, self.depth, self.slot)
+
+
+class LOAD_LOCAL(Opcode):
+    """ Load a variable kept in the frame of the function, see
+    js.symbol_map.SymbolMap.close.
+    """
+    _immutable_fields_ = ['local', 'identifier']
+
+    def __init__(self, local, identifier):
+        self.local = local
+        self.identifier = identifier
+
+    def eval(self, ctx):
+        ctx.stack_append(ctx.get_local(self.local))
+
+    def __str__(self):
+        return 'LOAD_LOCAL "%s" (%d)' % (self.identifier, self.local)
+
+
+class LOAD_ARGUMENTS(Opcode):
+    """ Load the arguments object kept in a frame local slot, it is only
+    created on first use.
+    """
+    _immutable_fields_ = ['local']
+
+    def __init__(self, local):
+        self.local = local
+
+    def eval(self, ctx):
+        value = ctx.get_local(self.local)
+        if value is None:
+            value = ctx.arguments_object()
+            ctx.set_local(self.local, value)
+        ctx.stack_append(value)
+
+    def __str__(self):
+        return 'LOAD_ARGUMENTS (%d)' % (self.local)
+
+
+class LOAD_GLOBAL(Opcode):
+    """ Load a name no enclosing function binds, looking it up from the
+    environment of the global (or eval) code depth levels up.
+    """
+    _immutable_fields_ = ['depth', 'identifier', 'cache']
+
+    def __init__(self, depth, identifier):
+        self.depth = depth
+        self.identifier = identifier
+        self.cache = GlobalCache()
+
+    def eval(self, ctx):
+        env = ctx.lexical_environment_at(self.depth)
+        value = load_global(self.cache, env.environment_record, self.identifier)
+        if value is None:
+            ref = env.get_identifier_reference(self.identifier)
+            value = ref.get_value(self.identifier)
+        ctx.stack_append(value)
+
+    def __str__(self):
+        return 'LOAD_GLOBAL "%s" (%d)' % (self.identifier, self.depth)
+
+
 class LOAD_THIS(Opcode):
     # 11.1.1
     def eval(self, ctx):
@@ -174,7 +375,7 @@ class LOAD_ARRAY(Opcode):
         from js.object_space import object_space
         array = object_space.new_array()
 
-        list_w = ctx.stack_pop_n(self.counter)  # [:] # pop_n returns a non-resizable list
+        list_w = ctx.stack_pop_n(self.counter)
         for index, el in enumerate(list_w):
             array._idx_put(index, el, False)
         ctx.stack_append(array)
@@ -186,24 +387,6 @@ class LOAD_ARRAY(Opcode):
         return 'LOAD_ARRAY %d' % (self.counter,)
 
 
-class LOAD_LIST(Opcode):
-    _immutable_fields_ = ['counter']
-
-    def __init__(self, counter):
-        self.counter = counter
-
-    def eval(self, ctx):
-        from js.jsobj import W_List
-        list_w = ctx.stack_pop_n(self.counter)  # [:] # pop_n returns a non-resizable list
-        ctx.stack_append(W_List(list_w))
-
-    def stack_change(self):
-        return -1 * self.counter + 1
-
-    def __str__(self):
-        return u'LOAD_LIST %d' % (self.counter,)
-
-
 class LOAD_FUNCTION(Opcode):
     _immutable_fields_ = ['funcobj']
 
@@ -248,12 +431,16 @@ class LOAD_OBJECT(Opcode):
 
 
 class LOAD_MEMBER(Opcode):
+    _immutable_fields_ = ['cache']
     _stack_change = -1
 
+    def __init__(self):
+        self.cache = MemberCache()
+
     def eval(self, ctx):
         w_obj = ctx.stack_pop().ToObject()
         w_name = ctx.stack_pop()
-        value = w_obj.w_get(w_name)
+        value = load_member(self.cache, w_obj, w_name)
 
         ctx.stack_append(value)
 
@@ -274,8 +461,15 @@ class COMMA(BaseUnaryOperation):
         # XXX
 
 
-class SUB(BaseBinaryOperation):
-    def operation(self, ctx, left, right):
+class SUB(BaseQuickenedOperation):
+    def int_operation(self, ileft, iright):
+        return sub_int(ileft, iright)
+
+    def float_operation(self, fleft, fright):
+        from js.object_space import newfloat
+        return newfloat(fleft - fright)
+
+    def generic_operation(self, ctx, left, right):
         return sub(ctx, left, right)
 
 
@@ -328,8 +522,19 @@ class TYPEOF_VARIABLE(Opcode):
         return 'TYPEOF_VARIABLE %s' % (self.name)
 
 
-class ADD(BaseBinaryOperation):
-    def operation(self, ctx, left, right):
+class ADD(BaseQuickenedOperation):
+    def int_operation(self, ileft, iright):
+        return plus_int(ileft, iright)
+
+    def float_operation(self, fleft, fright):
+        from js.object_space import newfloat
+        return newfloat(fleft + fright)
+
+    def string_operation(self, ctx, left, right):
+        from js.jsobj import concat_strings
+        return concat_strings(left, right)
+
+    def generic_operation(self, ctx, left, right):
         return plus(left, right)
 
 
@@ -409,8 +614,15 @@ class LSH(BaseBinaryBitwiseOp):
         ctx.stack_append(_w(res))
 
 
-class MUL(BaseBinaryOperation):
-    def operation(self, ctx, op1, op2):
+class MUL(BaseQuickenedOperation):
+    def int_operation(self, ileft, iright):
+        return mult_int(ileft, iright)
+
+    def float_operation(self, fleft, fright):
+        from js.object_space import newfloat
+        return newfloat(fleft * fright)
+
+    def generic_operation(self, ctx, op1, op2):
         return mult(ctx, op1, op2)
 
 
@@ -473,29 +685,65 @@ class DECR(BaseUnaryOperation):
         ctx.stack_append(newvalue)
 
 
-class GT(BaseBinaryComparison):
-    def decision(self, op1, op2):
+class GT(BaseQuickenedComparison):
+    def int_decision(self, ileft, iright):
+        return ileft > iright
+
+    def float_decision(self, fleft, fright):
+        return fleft > fright
+
+    def string_decision(self, sleft, sright):
+        return sleft > sright
+
+    def generic_decision(self, op1, op2):
         from js.baseop import compare_gt
         res = compare_gt(op1, op2)
         return res
 
 
-class GE(BaseBinaryComparison):
-    def decision(self, op1, op2):
+class GE(BaseQuickenedComparison):
+    def int_decision(self, ileft, iright):
+        return ileft >= iright
+
+    def float_decision(self, fleft, fright):
+        return fleft >= fright
+
+    def string_decision(self, sleft, sright):
+        return sleft >= sright
+
+    def generic_decision(self, op1, op2):
         from js.baseop import compare_ge
         res = compare_ge(op1, op2)
         return res
 
 
-class LT(BaseBinaryComparison):
-    def decision(self, op1, op2):
+class LT(BaseQuickenedComparison):
+    def int_decision(self, ileft, iright):
+        return ileft < iright
+
+    def float_decision(self, fleft, fright):
+        return fleft < fright
+
+    def string_decision(self, sleft, sright):
+        return sleft < sright
+
+    def generic_decision(self, op1, op2):
         from js.baseop import compare_lt
         res = compare_lt(op1, op2)
         return res
 
 
-class LE(BaseBinaryComparison):
-    def decision(self, op1, op2):
+class LE(BaseQuickenedComparison):
+    def int_decision(self, ileft, iright):
+        return ileft <= iright
+
+    def float_decision(self, fleft, fright):
+        return fleft <= fright
+
+    def string_decision(self, sleft, sright):
+        return sleft <= sright
+
+    def generic_decision(self, op1, op2):
         from js.baseop import compare_le
         res = compare_le(op1, op2)
         return res
@@ -522,8 +770,12 @@ class ISNOT(BaseBinaryComparison):
 
 
 class STORE_MEMBER(Opcode):
+    _immutable_fields_ = ['cache']
     _stack_change = 0
 
+    def __init__(self):
+        self.cache = MemberCache()
+
     def eval(self, ctx):
         left = ctx.stack_pop()
         w_name = ctx.stack_pop()
@@ -531,29 +783,117 @@ class STORE_MEMBER(Opcode):
         value = ctx.stack_pop()
 
         l_obj = left.ToObject()
-        l_obj.w_put(w_name, value)
+        store_member(self.cache, l_obj, w_name, value)
 
         ctx.stack_append(value)
 
 
 class STORE(Opcode):
-    _immutable_fields_ = ['identifier', 'index']
+    _immutable_fields_ = ['identifier', 'index', 'cache']
     _stack_change = 0
 
     def __init__(self, index, identifier):
         assert index is not None
         self.index = index
         self.identifier = identifier
+        self.cache = GlobalCache()
 
     def eval(self, ctx):
         value = ctx.stack_top()
         ref = ctx.get_ref(self.identifier, self.index)
-        ref.put_value(value, self.identifier)
+        if not store_global(self.cache, ref.base_env, self.identifier, value):
+            ref.put_value(value, self.identifier)
 
     def __str__(self):
         return 'STORE "%s" (%d)' % (self.identifier, self.index)
 
 
+class STORE_SCOPED(Opcode):
+    _immutable_fields_ = ['depth', 'slot', 'identifier']
+    _stack_change = 0
+
+    def __init__(self, depth, slot, identifier):
+        self.depth = depth
+        self.slot = slot
+        self.identifier = identifier
+
+    def eval(self, ctx):
+        value = ctx.stack_top()
+        env = ctx.lexical_environment_at(self.depth)
+        env.environment_record.set_mutable_binding_at(self.slot, value)
+
+    def __str__(self):
+        return 'STORE_SCOPED "%s" (%d, %d)' % (self.identifier, self.depth, self.slot)
+
+
+class STORE_LOCAL(Opcode):
+    _immutable_fields_ = ['local', 'identifier']
+    _stack_change = 0
+
+    def __init__(self, local, identifier):
+        self.local = local
+        self.identifier = identifier
+
+    def eval(self, ctx):
+        ctx.set_local(self.local, ctx.stack_top())
+
+    def __str__(self):
+        return 'STORE_LOCAL "%s" (%d)' % (self.identifier, self.local)
+
+
+class INCR_LOCAL_INT(Opcode):
+    """ Add step to the int induction variable of a loop kept in a frame
+    local, see js.operations.For.int_induction_local.
+
+    An overflowing result becomes a float number. If the local does not hold
+    an int the addition is the generic one, on the number value of the local
+    unless the loop steps it with +=.
+    """
+    _immutable_fields_ = ['local', 'step', 'identifier', 'to_number']
+    _stack_change = 0
+
+    def __init__(self, local, step, identifier, to_number):
+        self.local = local
+        self.step = step
+        self.identifier = identifier
+        self.to_number = to_number
+
+    def eval(self, ctx):
+        from js.jsobj import W_IntNumber
+        from js.object_space import newint
+        value = ctx.get_local(self.local)
+        if isinstance(value, W_IntNumber):
+            result = plus_int(value.ToInteger(), self.step)
+        elif self.to_number:
+            result = plus(_w(value.ToNumber()), newint(self.step))
+        else:
+            result = plus(value, newint(self.step))
+        ctx.set_local(self.local, result)
+
+    def __str__(self):
+        return 'INCR_LOCAL_INT "%s" (%d) %d' % (self.identifier, self.local, self.step)
+
+
+class STORE_GLOBAL(Opcode):
+    _immutable_fields_ = ['depth', 'identifier', 'cache']
+    _stack_change = 0
+
+    def __init__(self, depth, identifier):
+        self.depth = depth
+        self.identifier = identifier
+        self.cache = GlobalCache()
+
+    def eval(self, ctx):
+        value = ctx.stack_top()
+        env = ctx.lexical_environment_at(self.depth)
+        if not store_global(self.cache, env.environment_record, self.identifier, value):
+            ref = env.get_identifier_reference(self.identifier)
+            ref.put_value(value, self.identifier)
+
+    def __str__(self):
+        return 'STORE_GLOBAL "%s" (%d)' % (self.identifier, self.depth)
+
+
 class LABEL(Opcode):
     _stack_change = 0
     _immutable_fields_ = ['num']
@@ -569,14 +909,18 @@ class LABEL(Opcode):
 
 
 class BaseJump(Opcode):
+    """ Jumps are not evaluated, JsCode.run calls do_jump instead.
+    """
     _immutable_fields_ = ['where']
     _stack_change = 0
+    _jump = True
 
     def __init__(self, where):
         self.where = where
-        self.decision = False
 
     def do_jump(self, ctx, pos):
+        """ Execute in context ctx and return the next pc
+        """
         return 0
 
     #def __repr__(self):
@@ -584,9 +928,6 @@ class BaseJump(Opcode):
 
 
 class JUMP(BaseJump):
-    def eval(self, ctx):
-        pass
-
     def do_jump(self, ctx, pos):
         return self.where
 
@@ -594,21 +935,10 @@ class JUMP(BaseJump):
         return 'JUMP %d' % (self.where)
 
 
-class BaseIfJump(BaseJump):
-    def eval(self, ctx):
-        value = ctx.stack_pop()
-        self.decision = value.to_boolean()
-
-
-class BaseIfNopopJump(BaseJump):
-    def eval(self, ctx):
-        value = ctx.stack_top()
-        self.decision = value.to_boolean()
-
-
-class JUMP_IF_FALSE(BaseIfJump):
+class JUMP_IF_FALSE(BaseJump):
     def do_jump(self, ctx, pos):
-        if self.decision:
+        value = ctx.stack_pop()
+        if value.to_boolean():
             return pos + 1
         return self.where
 
@@ -616,9 +946,10 @@ class JUMP_IF_FALSE(BaseIfJump):
         return 'JUMP_IF_FALSE %d' % (self.where)
 
 
-class JUMP_IF_FALSE_NOPOP(BaseIfNopopJump):
+class JUMP_IF_FALSE_NOPOP(BaseJump):
     def do_jump(self, ctx, pos):
-        if self.decision:
+        value = ctx.stack_top()
+        if value.to_boolean():
             ctx.stack_pop()
             return pos + 1
         return self.where
@@ -627,9 +958,10 @@ class JUMP_IF_FALSE_NOPOP(BaseIfNopopJump):
         return 'JUMP_IF_FALSE_NOPOP %d' % (self.where)
 
 
-class JUMP_IF_TRUE(BaseIfJump):
+class JUMP_IF_TRUE(BaseJump):
     def do_jump(self, ctx, pos):
-        if self.decision:
+        value = ctx.stack_pop()
+        if value.to_boolean():
             return self.where
         return pos + 1
 
@@ -637,9 +969,10 @@ class JUMP_IF_TRUE(BaseIfJump):
         return 'JUMP_IF_TRUE %d' % (self.where)
 
 
-class JUMP_IF_TRUE_NOPOP(BaseIfNopopJump):
+class JUMP_IF_TRUE_NOPOP(BaseJump):
     def do_jump(self, ctx, pos):
-        if self.decision:
+        value = ctx.stack_top()
+        if value.to_boolean():
             return self.where
         ctx.stack_pop()
         return pos + 1
@@ -648,6 +981,71 @@ class JUMP_IF_TRUE_NOPOP(BaseIfNopopJump):
         return 'JUMP_IF_TRUE_NOPOP %d' % (self.where)
 
 
+class BaseCompareJump(BaseJump):
+    """ Relational comparison of the two values on top of the stack that
+    jumps if it is false, see js.operations.For.int_induction_local.
+
+    Ints are compared directly, any other values like the comparison opcode
+    does.
+    """
+    def do_jump(self, ctx, pos):
+        from js.jsobj import W_IntNumber
+        right = ctx.stack_pop()
+        left = ctx.stack_pop()
+        if isinstance(left, W_IntNumber) and isinstance(right, W_IntNumber):
+            res = self.int_decision(left.ToInteger(), right.ToInteger())
+        else:
+            res = self.generic_decision(left, right)
+        if res:
+            return pos + 1
+        return self.where
+
+    def int_decision(self, ileft, iright):
+        raise NotImplementedError
+
+    def generic_decision(self, op1, op2):
+        raise NotImplementedError
+
+    def __str__(self):
+        return '%s %d' % (self.__class__.__name__, self.where)
+
+
+class JUMP_IF_NOT_LT(BaseCompareJump):
+    def int_decision(self, ileft, iright):
+        return ileft < iright
+
+    def generic_decision(self, op1, op2):
+        from js.baseop import compare_lt
+        return compare_lt(op1, op2)
+
+
+class JUMP_IF_NOT_LE(BaseCompareJump):
+    def int_decision(self, ileft, iright):
+        return ileft <= iright
+
+    def generic_decision(self, op1, op2):
+        from js.baseop import compare_le
+        return compare_le(op1, op2)
+
+
+class JUMP_IF_NOT_GT(BaseCompareJump):
+    def int_decision(self, ileft, iright):
+        return ileft > iright
+
+    def generic_decision(self, op1, op2):
+        from js.baseop import compare_gt
+        return compare_gt(op1, op2)
+
+
+class JUMP_IF_NOT_GE(BaseCompareJump):
+    def int_decision(self, ileft, iright):
+        return ileft >= iright
+
+    def generic_decision(self, op1, op2):
+        from js.baseop import compare_ge
+        return compare_ge(op1, op2)
+
+
 class RETURN(Opcode):
     _stack_change = 0
 
@@ -669,38 +1067,76 @@ def common_call(ctx, funcobj, args, this, identifyer):
         err = u"%s is not a callable (%s)" % (funcobj.to_string(), identifyer.to_string())
         raise JsTypeError(err)
 
-    from js.jsobj import W_List, W_BasicFunction
-    assert isinstance(args, W_List)
+    from js.jsobj import W_BasicFunction
     assert isinstance(funcobj, W_BasicFunction)
 
-    argv = args.to_list()
-    res = funcobj.Call(args=argv, this=this, calling_context=ctx)
+    res = funcobj.Call(args=args, this=this, calling_context=ctx)
     return res
 
 
 class CALL(Opcode):
-    _stack_change = 0
+    _immutable_fields_ = ['argc']
+
+    def __init__(self, argc):
+        self.argc = argc
 
     def eval(self, ctx):
         r1 = ctx.stack_pop()
-        args = ctx.stack_pop()
+        args = ctx.stack_pop_n(self.argc)
         this = ctx.implicit_this_binding()
         res = common_call(ctx, r1, args, this, r1)
         ctx.stack_append(res)
 
+    def stack_change(self):
+        return -1 * self.argc
+
+    def __str__(self):
+        return 'CALL %d' % (self.argc,)
+
 
 class CALL_METHOD(Opcode):
-    _stack_change = -2
+    _immutable_fields_ = ['argc', 'cache']
+
+    def __init__(self, argc):
+        self.argc = argc
+        self.cache = MemberCache()
 
     def eval(self, ctx):
         method = ctx.stack_pop()
-        what = ctx.stack_pop().ToObject()
-        args = ctx.stack_pop()
-        name = method.to_string()
-        r1 = what.get(name)
+        what = ctx.stack_pop()
+        args = ctx.stack_pop_n(self.argc)
+        proto = _primitive_prototype(what)
+        if proto is not None:
+            # look the method up without allocating a wrapper object, the
+            # primitive is passed as this
+            r1 = load_member(self.cache, proto, method)
+        else:
+            what = what.ToObject()
+            r1 = load_member(self.cache, what, method)
         res = common_call(ctx, r1, args, what, method)
         ctx.stack_append(res)
 
+    def stack_change(self):
+        return -1 * self.argc - 1
+
+    def __str__(self):
+        return 'CALL_METHOD %d' % (self.argc,)
+
+
+def _primitive_prototype(value):
+    from js.jsobj import W_BasicObject, W_String, W_Number, W_Boolean
+    from js.object_space import object_space
+    if isinstance(value, W_String):
+        proto = object_space.proto_string
+    elif isinstance(value, W_Number):
+        proto = object_space.proto_number
+    elif isinstance(value, W_Boolean):
+        proto = object_space.proto_boolean
+    else:
+        return None
+    assert isinstance(proto, W_BasicObject)
+    return proto
+
 
 class DUP(Opcode):
     def eval(self, ctx):
@@ -796,18 +1232,23 @@ def commonnew(ctx, obj, args):
 
 
 class NEW(Opcode):
-    _stack_change = 0
+    _immutable_fields_ = ['argc']
 
-    def eval(self, ctx):
-        from js.jsobj import W_List
+    def __init__(self, argc):
+        self.argc = argc
 
-        y = ctx.stack_pop()
+    def eval(self, ctx):
+        args = ctx.stack_pop_n(self.argc)
         x = ctx.stack_pop()
-        assert isinstance(y, W_List)
-        args = y.to_list()
         res = commonnew(ctx, x, args)
         ctx.stack_append(res)
 
+    def stack_change(self):
+        return -1 * self.argc
+
+    def __str__(self):
+        return 'NEW %d' % (self.argc,)
+
 
 class NEW_NO_ARGS(Opcode):
     _stack_change = 0
@@ -856,9 +1297,6 @@ class LOAD_ITERATOR(Opcode):
 
 
 class JUMP_IF_ITERATOR_EMPTY(BaseJump):
-    def eval(self, ctx):
-        pass
-
     def do_jump(self, ctx, pos):
         from js.jsobj import W_Iterator
         last_block_value = ctx.stack_pop()
@@ -899,6 +1337,11 @@ class WITH(Opcode):
     def __init__(self, body):
         self.body = body
 
+    def stack_change(self):
+        # the body runs on the stack of the enclosing code, see
+        # WithExecutionContext
+        return self.body.estimated_stack_size()
+
     def eval(self, ctx):
         from js.completion import is_return_completion
         from execution_context import WithExecutionContext
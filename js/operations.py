@@ -194,7 +194,7 @@ class AssignmentOperation(BaseAssignment):
         self.post = post
 
     def emit_store(self, bytecode):
-        bytecode.emit('STORE', self.index, self.identifier)
+        emit_store_variable(bytecode, self.left.scope, self.identifier, self.index)
 
 
 class LocalAssignmentOperation(AssignmentOperation):
@@ -210,7 +210,7 @@ class LocalAssignmentOperation(AssignmentOperation):
         self.post = post
 
     def emit_store(self, bytecode):
-        bytecode.emit('STORE_LOCAL', self.local)
+        bytecode.emit('STORE_LOCAL', self.local, self.identifier)
 
 
 class MemberAssignmentOperation(BaseAssignment):
@@ -289,12 +289,12 @@ class Call(Expression):
             left.left.emit(bytecode)
             # XXX optimise
             bytecode.emit('LOAD_STRINGCONSTANT', left.name)
-            bytecode.emit('CALL_METHOD')
+            bytecode.emit('CALL_METHOD', self.args.count())
         elif isinstance(left, Member):
             raise NotImplementedError
         else:
             left.emit(bytecode)
-            bytecode.emit('CALL')
+            bytecode.emit('CALL', self.args.count())
 
 Comma = create_binary_op('COMMA')
 
@@ -341,12 +341,13 @@ class MemberDot(Expression):
 
 
 class FunctionStatement(Statement):
-    def __init__(self, pos, name, index, body_ast, symbol_map):
+    def __init__(self, pos, name, index, body_ast, symbol_map, scope=None):
         self.pos = pos
         self.name = name
         self.index = index
         self.body_ast = body_ast
         self.symbol_map = symbol_map
+        self.scope = scope
 
     def emit(self, bytecode):
         from jscode import ast_to_bytecode
@@ -361,20 +362,64 @@ class FunctionStatement(Statement):
 
         bytecode.emit('LOAD_FUNCTION', jsfunc)
         if index is not None:
-            bytecode.emit('STORE', index, name)
+            emit_store_variable(bytecode, self.scope, name, index)
+
+
+def resolve_identifier(scope, name):
+    from js.symbol_map import DYNAMIC
+    if scope is None:
+        return DYNAMIC, 0
+    return scope.resolve(name)
+
+
+def emit_load_variable(bytecode, scope, name, index):
+    from js.symbol_map import DYNAMIC, LOCAL, GLOBAL
+    depth, slot = resolve_identifier(scope, name)
+    if depth == LOCAL and name == u'arguments' and scope.function_scope().has_arguments_object():
+        bytecode.emit('LOAD_ARGUMENTS', slot)
+    elif depth == LOCAL:
+        bytecode.emit('LOAD_LOCAL', slot, name)
+    elif depth == DYNAMIC or (slot == GLOBAL and depth == 0):
+        bytecode.emit('LOAD_VARIABLE', index, name)
+    elif slot == GLOBAL:
+        bytecode.emit('LOAD_GLOBAL', depth, name)
+    else:
+        bytecode.emit('LOAD_SCOPED', depth, slot, name)
+
+
+def emit_store_variable(bytecode, scope, name, index):
+    from js.symbol_map import DYNAMIC, LOCAL, GLOBAL
+    depth, slot = resolve_identifier(scope, name)
+    if depth == LOCAL:
+        bytecode.emit('STORE_LOCAL', slot, name)
+    elif depth == DYNAMIC or (slot == GLOBAL and depth == 0):
+        bytecode.emit('STORE', index, name)
+    elif slot == GLOBAL:
+        bytecode.emit('STORE_GLOBAL', depth, name)
+    else:
+        bytecode.emit('STORE_SCOPED', depth, slot, name)
 
 
 class Identifier(Expression):
-    def __init__(self, pos, name, index):
+    def __init__(self, pos, name, index, scope=None):
         self.pos = pos
         self.name = name
         self.index = index
+        self.scope = scope
 
     def __repr__(self):
         return "Identifier '%s'@%d" % (self.name, self.index)
 
     def emit(self, bytecode):
-        bytecode.emit('LOAD_VARIABLE', self.index, self.name)
+        emit_load_variable(bytecode, self.scope, self.name, self.index)
+
+    def emit_store(self, bytecode):
+        emit_store_variable(bytecode, self.scope, self.name, self.index)
+
+    def is_static(self):
+        from js.symbol_map import DYNAMIC, GLOBAL
+        depth, slot = resolve_identifier(self.scope, self.name)
+        return depth != DYNAMIC and slot != GLOBAL
 
     def get_literal(self):
         return self.name
@@ -560,7 +605,7 @@ class Typeof(Expression):
 
     def emit(self, bytecode):
         # obscure hack to be compatible
-        if isinstance(self.left, Identifier):
+        if isinstance(self.left, Identifier) and not self.left.is_static():
             bytecode.emit('TYPEOF_VARIABLE', self.left.index, self.left.name)
         else:
             self.left.emit(bytecode)
@@ -574,7 +619,10 @@ class Delete(Expression):
 
     def emit(self, bytecode):
         what = self.what
-        if isinstance(what, Identifier):
+        if isinstance(what, Identifier) and what.is_static():
+            # declared bindings can not be deleted (10.5)
+            bytecode.emit('LOAD_BOOLCONSTANT', False)
+        elif isinstance(what, Identifier):
             bytecode.emit('DELETE', what.name, what.index)
         elif isinstance(what, MemberDot):
             what.left.emit(bytecode)
@@ -598,9 +646,12 @@ class Delete(Expression):
 
 class ArgumentList(ListOp):
     def emit(self, bytecode):
+        # the values stay on the stack, the call pops count() of them
         for node in self.nodes:
             node.emit(bytecode)
-        bytecode.emit('LOAD_LIST', len(self.nodes))
+
+    def count(self):
+        return len(self.nodes)
 
 ##############################################################################
 #
@@ -645,7 +696,7 @@ class NewWithArgs(Expression):
     def emit(self, bytecode):
         self.left.emit(bytecode)
         self.right.emit(bytecode)
-        bytecode.emit('NEW')
+        bytecode.emit('NEW', self.right.count())
 
 
 class BaseNumber(Expression):
@@ -811,6 +862,7 @@ class VariableDeclaration(Expression):
     def __init__(self, pos, identifier, index, expr=None):
         self.pos = pos
         self.identifier = identifier.get_literal()
+        self.scope = identifier.scope
         assert identifier is not None
         self.expr = expr
         assert index is not None
@@ -819,11 +871,14 @@ class VariableDeclaration(Expression):
     def emit(self, bytecode):
         if self.expr is not None:
             self.expr.emit(bytecode)
-            bytecode.emit('STORE', self.index, self.identifier)
+            self.emit_store(bytecode)
         else:
             # variable declaration actualy does nothing
             bytecode.emit('LOAD_UNDEFINED')
 
+    def emit_store(self, bytecode):
+        emit_store_variable(bytecode, self.scope, self.identifier, self.index)
+
     def __str__(self):
         return "VariableDeclaration %s:%s" % (self.identifier, self.expr)
 
@@ -991,14 +1046,10 @@ class ForIn(Statement):
         if isinstance(left_expr, This):
             raise JsException(u'Invalid left-hand side in for-in')
         if isinstance(left_expr, Identifier):
-            name = left_expr.name
-            index = left_expr.index
-            bytecode.emit('STORE', index, name)
+            left_expr.emit_store(bytecode)
             bytecode.emit('POP')
         elif isinstance(left_expr, VariableDeclaration):
-            name = left_expr.identifier
-            index = left_expr.index
-            bytecode.emit('STORE', index, name)
+            left_expr.emit_store(bytecode)
             bytecode.emit('POP')
         elif isinstance(left_expr, MemberDot):
             bytecode.emit('LOAD_STRINGCONSTANT', left_expr.name)
@@ -1028,6 +1079,7 @@ class For(Statement):
         self.body = body
 
     def emit(self, bytecode):
+        local = self.int_induction_local()
         self.setup.emit(bytecode)
         if isinstance(self.setup, Expression) or isinstance(self.setup, VariableDeclList):
             bytecode.emit('POP')
@@ -1035,16 +1087,146 @@ class For(Statement):
         precond = bytecode.emit_startloop_label()
         finish = bytecode.prealocate_endloop_label()
         update = bytecode.prealocate_updateloop_label()
-        self.condition.emit(bytecode)
-        bytecode.emit('JUMP_IF_FALSE', finish)
+        if local >= 0:
+            emit_compare_jump(bytecode, self.condition, finish)
+        else:
+            self.condition.emit(bytecode)
+            bytecode.emit('JUMP_IF_FALSE', finish)
         bytecode.emit('POP')
+        body_start = len(bytecode.opcodes)
         self.body.emit(bytecode)
         bytecode.emit_updateloop_label(update)
-        self.update.emit(bytecode)
-        bytecode.emit('POP')
+        if local >= 0 and not stores_local(bytecode, body_start, local):
+            update_node = self.update
+            assert isinstance(update_node, AssignmentOperation)
+            to_number = update_node.operand != '+='
+            bytecode.emit('INCR_LOCAL_INT', local, int_step(update_node), update_node.identifier, to_number)
+        else:
+            self.update.emit(bytecode)
+            bytecode.emit('POP')
         bytecode.emit('JUMP', precond)
         bytecode.emit_endloop_label(finish)
 
+    def int_induction_local(self):
+        """ The frame local of the int induction variable of the loop, or -1.
+
+        That is a loop like for (var i = 0; i < n; i++): the variable is a
+        frame local the setup initializes to an int32 constant, the
+        condition compares and the update steps by an int32 constant. The
+        loop compares and steps it with int opcodes, which fall back to
+        the generic operations if the body stored something else in it.
+        """
+        name = comparison_variable(self.condition)
+        if name is None or name == u'arguments':
+            return -1
+        if not starts_as_int(self.setup, name):
+            return -1
+        update = self.update
+        if not isinstance(update, AssignmentOperation) or update.identifier != name:
+            return -1
+        if int_step(update) == 0:
+            return -1
+
+        from js.symbol_map import LOCAL
+        scope = update.left.scope
+        depth, slot = resolve_identifier(scope, name)
+        if depth != LOCAL:
+            return -1
+        return slot
+
+
+def is_int32_literal(node):
+    return isinstance(node, IntNumber) and -2147483648 <= node.num <= 2147483647
+
+
+def comparison_operands(node):
+    """ The operands of node if it is a relational comparison, or None.
+    """
+    if isinstance(node, Lt):
+        return [node.left, node.right]
+    if isinstance(node, Le):
+        return [node.left, node.right]
+    if isinstance(node, Gt):
+        return [node.left, node.right]
+    if isinstance(node, Ge):
+        return [node.left, node.right]
+    return None
+
+
+def comparison_variable(node):
+    """ The name of the variable node compares, see
+    For.int_induction_local.
+    """
+    operands = comparison_operands(node)
+    if operands is None:
+        return None
+    left = operands[0]
+    if isinstance(left, Identifier) and not isinstance(left, This):
+        return left.name
+    return None
+
+
+def starts_as_int(setup, name):
+    """ Whether the last value setup assigns to the variable name is an
+    int32 literal.
+    """
+    if isinstance(setup, VariableDeclList):
+        result = False
+        for node in setup.nodes:
+            if isinstance(node, VariableDeclaration) and node.identifier == name:
+                result = is_int32_literal(node.expr)
+        return result
+    if isinstance(setup, AssignmentOperation) and setup.identifier == name and not setup.has_operation():
+        return is_int32_literal(setup.right)
+    return False
+
+
+def int_step(update):
+    """ The int32 literal update adds to its variable, or 0.
+    """
+    if update.operand == '++':
+        return 1
+    if update.operand == '--':
+        return -1
+    right = update.right
+    if not is_int32_literal(right):
+        return 0
+    assert isinstance(right, IntNumber)
+    if update.operand == '+=':
+        return right.num
+    if update.operand == '-=' and right.num != -2147483648:
+        return -right.num
+    return 0
+
+
+def stores_local(bytecode, start, local):
+    """ Whether the opcodes emitted from start on store to the frame local.
+    """
+    from js.opcodes import STORE_LOCAL
+    for opcode in bytecode.opcodes[start:]:
+        if isinstance(opcode, STORE_LOCAL) and opcode.local == local:
+            return True
+    return False
+
+
+def emit_compare_jump(bytecode, condition, label):
+    """ Emits condition of For.int_induction_local as a comparison that
+    jumps to label when false.
+    """
+    operands = comparison_operands(condition)
+    assert operands is not None
+    for operand in operands:
+        operand.emit(bytecode)
+    # calls to bytecode.emit have to be very very very static
+    if isinstance(condition, Lt):
+        bytecode.emit('JUMP_IF_NOT_LT', label)
+    elif isinstance(condition, Le):
+        bytecode.emit('JUMP_IF_NOT_LE', label)
+    elif isinstance(condition, Gt):
+        bytecode.emit('JUMP_IF_NOT_GT', label)
+    else:
+        bytecode.emit('JUMP_IF_NOT_GE', label)
+
 
 class Boolean(Expression):
     def __init__(self, pos, boolval):
@@ -0,0 +1,160 @@
+""" Peephole optimizations of the opcodes of a JsCode, see JsCode.compile.
+
+They run once the labels are removed, jumps hold the position they jump to.
+"""
+
+from js.opcodes import BaseJump, JUMP, RETURN, THROW, POP, DUP, INCR, DECR, \
+    STORE, STORE_LOCAL, STORE_SCOPED, STORE_GLOBAL, LOAD_UNDEFINED, LOAD_NULL, \
+    LOAD_INTCONSTANT, LOAD_FLOATCONSTANT, LOAD_STRINGCONSTANT, \
+    LOAD_BOOLCONSTANT, LOAD_LOCAL
+
+# maximum number of passes over the opcodes
+MAX_PASSES = 8
+
+
+def optimize(opcodes):
+    """ Returns the optimized list of opcodes, the jumps of opcodes are
+    changed in place.
+    """
+    thread_jumps(opcodes)
+    for i in range(MAX_PASSES):
+        targets = jump_targets(opcodes)
+        keep = [True] * len(opcodes)
+        removed = remove_dead_code(opcodes, targets, keep)
+        removed += remove_pops(opcodes, targets, keep)
+        removed += remove_jumps_to_next(opcodes, keep)
+        if removed == 0:
+            break
+        opcodes = compact(opcodes, keep)
+    return opcodes
+
+
+def jump_targets(opcodes):
+    """ Positions some jump jumps to, the end of the code included.
+    """
+    targets = [False] * (len(opcodes) + 1)
+    for opcode in opcodes:
+        if isinstance(opcode, BaseJump):
+            targets[opcode.where] = True
+    return targets
+
+
+def thread_jumps(opcodes):
+    """ Jumps to an unconditional jump jump to its target instead.
+    """
+    count = len(opcodes)
+    for opcode in opcodes:
+        if not isinstance(opcode, BaseJump):
+            continue
+        where = opcode.where
+        # the hops are bounded, a loop like while(true){} jumps to itself
+        hops = 0
+        while where < count and hops < count:
+            target = opcodes[where]
+            if not isinstance(target, JUMP):
+                break
+            where = target.where
+            hops += 1
+        opcode.where = where
+
+
+def _falls_through(opcode):
+    return not (isinstance(opcode, RETURN) or isinstance(opcode, THROW) or isinstance(opcode, JUMP))
+
+
+def remove_dead_code(opcodes, targets, keep):
+    """ Removes the opcodes after a return, throw or jump that no jump
+    reaches.
+    """
+    removed = 0
+    reachable = True
+    for i in range(len(opcodes)):
+        if targets[i]:
+            reachable = True
+        if not reachable:
+            keep[i] = False
+            removed += 1
+        elif not _falls_through(opcodes[i]):
+            reachable = False
+    return removed
+
+
+def _is_pure_load(opcode):
+    return isinstance(opcode, LOAD_UNDEFINED) or isinstance(opcode, LOAD_NULL) or \
+        isinstance(opcode, LOAD_INTCONSTANT) or isinstance(opcode, LOAD_FLOATCONSTANT) or \
+        isinstance(opcode, LOAD_STRINGCONSTANT) or isinstance(opcode, LOAD_BOOLCONSTANT) or \
+        isinstance(opcode, LOAD_LOCAL) or isinstance(opcode, DUP)
+
+
+def _is_store(opcode):
+    return isinstance(opcode, STORE) or isinstance(opcode, STORE_LOCAL) or \
+        isinstance(opcode, STORE_SCOPED) or isinstance(opcode, STORE_GLOBAL)
+
+
+def remove_pops(opcodes, targets, keep):
+    """ Removes values pushed only to be popped.
+
+    That is a load without side effects followed by a POP, and the DUP of
+    the old value of a post increment or decrement whose value is not used:
+    DUP INCR STORE POP POP becomes INCR STORE POP.
+    """
+    removed = 0
+    count = len(opcodes)
+    i = 0
+    while i < count - 1:
+        if not keep[i]:
+            i += 1
+            continue
+        opcode = opcodes[i]
+        if _is_pure_load(opcode) and isinstance(opcodes[i + 1], POP) and \
+                keep[i + 1] and not targets[i + 1]:
+            keep[i] = False
+            keep[i + 1] = False
+            removed += 2
+            i += 2
+            continue
+        if isinstance(opcode, DUP) and i + 4 < count and \
+                (isinstance(opcodes[i + 1], INCR) or isinstance(opcodes[i + 1], DECR)) and \
+                _is_store(opcodes[i + 2]) and \
+                isinstance(opcodes[i + 3], POP) and isinstance(opcodes[i + 4], POP) and \
+                not (targets[i + 1] or targets[i + 2] or targets[i + 3] or targets[i + 4]):
+            keep[i] = False
+            keep[i + 3] = False
+            removed += 2
+            i += 5
+            continue
+        i += 1
+    return removed
+
+
+def remove_jumps_to_next(opcodes, keep):
+    removed = 0
+    for i in range(len(opcodes)):
+        opcode = opcodes[i]
+        if keep[i] and isinstance(opcode, JUMP) and opcode.where == i + 1:
+            keep[i] = False
+            removed += 1
+    return removed
+
+
+def compact(opcodes, keep):
+    """ The opcodes to keep, jumps to a removed opcode jump to the next one
+    kept.
+    """
+    count = len(opcodes)
+    positions = [0] * (count + 1)
+    position = 0
+    for i in range(count):
+        positions[i] = position
+        if keep[i]:
+            position += 1
+    positions[count] = position
+
+    result = []
+    for i in range(count):
+        if keep[i]:
+            opcode = opcodes[i]
+            if isinstance(opcode, BaseJump):
+                opcode.where = positions[opcode.where]
+            result.append(opcode)
+    return result
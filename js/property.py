@@ -4,6 +4,66 @@ from js.property_descriptor import PropertyDescriptor, DataPropertyDescriptor, A
 
 NOT_SET = -1
 
+# Property attributes as stored on a js.object_map.Map. Bit 0 marks accessor
+# properties, writable, enumerable and configurable take two bits each to
+# keep NOT_SET apart from False.
+ACCESSOR = 1
+_WRITABLE_SHIFT = 1
+_ENUMERABLE_SHIFT = 3
+_CONFIGURABLE_SHIFT = 5
+_FLAG_MASK = 3
+_FLAG_FALSE = 1
+_FLAG_TRUE = 2
+
+
+def _encode_flag(flag, shift):
+    if flag == NOT_SET:
+        return 0
+    if flag:
+        return _FLAG_TRUE << shift
+    return _FLAG_FALSE << shift
+
+
+def _decode_flag(attrs, shift):
+    bits = (attrs >> shift) & _FLAG_MASK
+    if bits == _FLAG_TRUE:
+        return True
+    if bits == _FLAG_FALSE:
+        return False
+    return NOT_SET
+
+
+def encode_attributes(accessor, writable, enumerable, configurable):
+    attrs = _encode_flag(writable, _WRITABLE_SHIFT) | _encode_flag(enumerable, _ENUMERABLE_SHIFT) | _encode_flag(configurable, _CONFIGURABLE_SHIFT)
+    if accessor:
+        attrs |= ACCESSOR
+    return attrs
+
+
+def is_accessor_attributes(attrs):
+    return attrs & ACCESSOR != 0
+
+
+def attr_writable(attrs):
+    return _decode_flag(attrs, _WRITABLE_SHIFT)
+
+
+def attr_enumerable(attrs):
+    return _decode_flag(attrs, _ENUMERABLE_SHIFT)
+
+
+def attr_configurable(attrs):
+    return _decode_flag(attrs, _CONFIGURABLE_SHIFT)
+
+
+def is_plain_data_attributes(attrs):
+    # data property that reads as its value, see js.jsobj._get_from_slot
+    return attrs & ACCESSOR == 0 and (attrs >> _WRITABLE_SHIFT) & _FLAG_MASK != 0
+
+
+def is_writable_data_attributes(attrs):
+    return attrs & ACCESSOR == 0 and (attrs >> _WRITABLE_SHIFT) & _FLAG_MASK == _FLAG_TRUE
+
 
 # 8.6.1
 class Property(object):
@@ -27,6 +87,9 @@ class Property(object):
     def to_property_descriptor(self):
         return PropertyDescriptor(enumerable=self.enumerable, configurable=self.configurable)
 
+    def attributes(self):
+        return encode_attributes(self.is_accessor_property(), self.writable, self.enumerable, self.configurable)
+
 
 class DataProperty(Property):
     def __init__(self, value=None, writable=NOT_SET, enumerable=NOT_SET, configurable=NOT_SET):
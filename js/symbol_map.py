@@ -1,12 +1,112 @@
 from js.object_map import new_map
 
+# results of Scope.resolve, see there
+DYNAMIC = -1
+LOCAL = -2
+GLOBAL = -1
 
-class SymbolMap(object):
-    def __init__(self):
+
+class Scope(object):
+    """ Compile time view of an environment, see SymbolMap and CatchScope.
+
+    references and inner_references record the names used by the code of
+    the scope itself and by the scopes nested in it, which decides what has
+    to live in the heap environment once the scope is closed.
+    """
+    def __init__(self, parent):
+        self.parent = parent
+        self.references = {}
+        self.inner_references = {}
+        # eval or with in a nested scope can reach any binding by name
+        self.dynamic_inner = False
+
+    def function_scope(self):
+        raise NotImplementedError(self.__class__)
+
+    def binds(self, name):
+        raise NotImplementedError(self.__class__)
+
+    def binding_slot(self, name):
+        raise NotImplementedError(self.__class__)
+
+    def local_slot(self, name):
+        return -1
+
+    def has_environment(self):
+        return True
+
+    def add_reference(self, name):
+        self.references[name] = None
+
+    def free_references(self):
+        free = []
+        for name in self.references.keys() + self.inner_references.keys():
+            if not self.binds(name) and name not in free:
+                free.append(name)
+        return free
+
+    def close(self):
+        """ Called once the scope has been parsed, the names it leaves free
+        are captured from the enclosing scope.
+        """
+        if self.parent is not None:
+            for name in self.free_references():
+                self.parent.inner_references[name] = None
+            if self.dynamic_inner or self.function_scope().dynamic:
+                self.parent.dynamic_inner = True
+
+    def resolve(self, name):
+        """ Resolve the identifier name from within this scope.
+
+        Returns (depth, slot): slot is the index of the binding in the
+        environment depth levels up the scope chain. A slot of GLOBAL means
+        that no function binds the name and it has to be looked up by name
+        in the environment of the global (or eval) code, depth levels up.
+        A depth of LOCAL means the name is the frame local slot of the
+        current function, a depth of DYNAMIC that the binding is only known
+        at runtime.
+        """
+        depth = 0
+        scope = self
+        while True:
+            if scope.function_scope().dynamic:
+                return DYNAMIC, 0
+            local = scope.local_slot(name)
+            if local >= 0:
+                assert depth == 0
+                return LOCAL, local
+            slot = scope.binding_slot(name)
+            if slot >= 0:
+                return depth, slot
+            if scope.parent is None:
+                break
+            if scope.has_environment():
+                depth += 1
+            scope = scope.parent
+        return depth, GLOBAL
+
+
+class SymbolMap(Scope):
+    """ Names declared in the scope of a function or of global/eval code.
+
+    The scopes are chained through parent to resolve identifiers statically
+    once the whole program has been parsed.
+    """
+    def __init__(self, parent=None, is_function=False):
+        Scope.__init__(self, parent)
         self.symbols = new_map()
         self.functions = []
         self.variables = []
         self.parameters = []
+        self.is_function = is_function
+        # eval or with can change the bindings of the scope at runtime
+        self.dynamic = False
+        # functions or catch blocks are nested in the scope
+        self.has_inner_scopes = False
+        # layout of the function, computed by close
+        self.environment = True
+        self.bindings = []
+        self.locals = []
 
     def add_symbol(self, identifyer):
         idx = self.symbols.lookup(identifyer)
@@ -47,18 +147,104 @@ class SymbolMap(object):
     def len(self):
         return self.symbols.len()
 
+    def function_scope(self):
+        return self
+
+    def declared_names(self):
+        """ Names bound by a function, in the order
+        declaration_binding_initialization (10.5) creates them.
+        """
+        names = []
+        if not self.is_function:
+            return names
+        # the arguments object is only bound if it could be used
+        arguments = []
+        if self.uses_arguments():
+            arguments = [u'arguments']
+        for name in self.parameters + self.functions + arguments + self.variables:
+            if name not in names:
+                names.append(name)
+        return names
+
+    def binds(self, name):
+        return name in self.declared_names()
+
+    def uses_arguments(self):
+        return self.dynamic or u'arguments' in self.references or u'arguments' in self.inner_references
+
+    def has_arguments_object(self):
+        # 10.5 7., parameters or functions named arguments shadow it
+        return self.is_function and self.uses_arguments() and \
+            u'arguments' not in self.parameters and u'arguments' not in self.functions
+
+    def _is_local(self, name):
+        # bindings no closure, catch block, eval or with can see are kept
+        # in the frame of the function instead of its environment. The
+        # arguments object is not mapped to the parameters, they can be
+        # locals as well.
+        if self.dynamic or self.dynamic_inner:
+            return False
+        if name in self.inner_references:
+            return False
+        return True
+
+    def has_environment(self):
+        return self.environment
+
+    def close(self):
+        # the environment is only allocated when something could capture
+        # it, otherwise all bindings are frame locals
+        self.environment = not self.is_function or self.dynamic or self.has_inner_scopes
+        Scope.close(self)
+        self.bindings = []
+        self.locals = []
+        for name in self.declared_names():
+            if self._is_local(name):
+                self.locals.append(name)
+            else:
+                self.bindings.append(name)
+
+    def binding_slot(self, name):
+        if name in self.bindings:
+            return self.bindings.index(name)
+        return -1
+
+    def local_slot(self, name):
+        if name in self.locals:
+            return self.locals.index(name)
+        return -1
+
+    def local_index(self, identifyer):
+        return self.local_slot(identifyer)
+
+    def locals_count(self):
+        return len(self.locals)
+
+    def environment_layout(self):
+        return None
+
     def finalize(self):
-        return FinalSymbolMap(self.symbols, self.functions, self.variables, self.parameters)
+        layout = None
+        if self.is_function:
+            layout = EnvironmentLayout(self.parameters, self.bindings, self.locals, self.has_arguments_object())
+        return FinalSymbolMap(self.symbols, self.functions, self.variables, self.parameters, self.locals, self.environment, self.has_arguments_object(), layout)
 
 
 class FinalSymbolMap(object):
-    _immutable_fields_ = ['symbols', 'functions[*]', 'variables[*]', 'parameters[*]']
+    _immutable_fields_ = ['symbols', 'functions[*]', 'variables[*]', 'parameters[*]', 'local_map', 'environment', 'arguments', 'layout']
 
-    def __init__(self, symbols, functions, variables, parameters):
+    def __init__(self, symbols, functions, variables, parameters, local_names=[], environment=True, arguments=True, layout=None):
         self.symbols = symbols
         self.functions = functions[:]
         self.variables = variables[:]
         self.parameters = parameters[:]
+        local_map = new_map()
+        for name in local_names:
+            local_map = local_map.add(name)
+        self.local_map = local_map
+        self.environment = environment
+        self.arguments = arguments
+        self.layout = layout
 
     def get_index(self, identifyer):
         return self.symbols.lookup(identifyer)
@@ -68,3 +254,75 @@ class FinalSymbolMap(object):
 
     def len(self):
         return self.symbols.len()
+
+    def local_index(self, identifyer):
+        return self.local_map.lookup(identifyer)
+
+    def locals_count(self):
+        return self.local_map.len()
+
+    def has_environment(self):
+        return self.environment
+
+    def has_arguments_object(self):
+        return self.arguments
+
+    def environment_layout(self):
+        return self.layout
+
+
+class EnvironmentLayout(object):
+    """ The bindings a call of a function starts with (10.5), computed once
+    when the function is compiled.
+
+    binding_map is the final Map of the environment record and slot_template
+    the initial values of its slots, parameter_slots and parameter_locals
+    tell where each argument goes, -1 if not to the environment or the frame.
+    """
+    _immutable_fields_ = ['binding_map', 'slot_template[*]', 'parameter_slots[*]', 'parameter_locals[*]', 'arguments_slot', 'arguments_local']
+
+    def __init__(self, parameters, bindings, local_names, arguments):
+        from js.object_space import newundefined
+        binding_map = new_map()
+        for name in bindings:
+            binding_map = binding_map.add(name)
+        self.binding_map = binding_map
+        # functions are assigned before any code of the body runs
+        self.slot_template = [newundefined()] * len(bindings)
+
+        self.parameter_slots = [binding_map.lookup(name) for name in parameters]
+        self.parameter_locals = [_index_of(local_names, name) for name in parameters]
+
+        self.arguments_slot = -1
+        self.arguments_local = -1
+        if arguments:
+            self.arguments_slot = binding_map.lookup(u'arguments')
+            self.arguments_local = _index_of(local_names, u'arguments')
+
+    def new_slots(self):
+        return self.slot_template[:]
+
+
+def _index_of(names, name):
+    if name in names:
+        return names.index(name)
+    return -1
+
+
+class CatchScope(Scope):
+    """ The environment holding the exception inside a catch block (12.14).
+    """
+    def __init__(self, parent, name):
+        Scope.__init__(self, parent)
+        self.name = name
+
+    def function_scope(self):
+        return self.parent.function_scope()
+
+    def binds(self, name):
+        return name == self.name
+
+    def binding_slot(self, name):
+        if name == self.name:
+            return 0
+        return -1
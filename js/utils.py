@@ -30,6 +30,18 @@ class StackMixin(object):
             raise IndexError
         return self._stack_[i]
 
+    @jit.unroll_safe
+    def _stack_pop_n(self, n):
+        # the top n values, in the order they were pushed
+        i = self._stack_pointer() - n
+        assert i >= 0
+        r = [None] * n
+        for j in range(n):
+            r[j] = self._stack_[i + j]
+            self._stack_[i + j] = None
+        self._stack_pointer_ = i
+        return r
+
     def _stack_append(self, element):
         i = self._stack_pointer()
         len_stack = len(self._stack_)
@@ -69,3 +69,88 @@ def test_make_array_index():
     assert make_array_index(' ') == NOT_ARRAY_INDEX
     assert make_array_index('x') == NOT_ARRAY_INDEX
     assert make_array_index('abc123') == NOT_ARRAY_INDEX
+
+
+def test_sort_default_order(capsys):
+    assertp("var x = [10, 9, 1, 100]; print(x.sort());", '1,10,100,9', capsys)
+    assertp("var x = ['b', 'a', 'c']; print(x.sort());", 'a,b,c', capsys)
+
+
+def test_sort_comparefn(capsys):
+    assertp("var x = [10, 9, 1, 100]; print(x.sort(function(a, b) { return a - b; }));", '1,9,10,100', capsys)
+    assertp("var x = [0.5, 0.25, 0.75]; print(x.sort(function(a, b) { return a - b; }));", '0.25,0.5,0.75', capsys)
+    assertp("var x = [1, 2, 3]; print(x.sort(function(a, b) { return b - a; }));", '3,2,1', capsys)
+
+
+def test_sort_stable(capsys):
+    assertp("""
+    var x = [[1, 'a'], [0, 'b'], [1, 'c'], [0, 'd']];
+    x.sort(function(a, b) { return a[0] - b[0]; });
+    print(x.join(';'));
+    """, '0,b;0,d;1,a;1,c', capsys)
+
+
+def test_sort_undefined_and_holes(capsys):
+    assertp("""
+    var x = [3, undefined, 1];
+    x[5] = 2;
+    x.sort();
+    print(x[0], x[1], x[2], x[3], x.length, 4 in x, 5 in x);
+    """, '1,2,3,undefined,6,false,false', capsys)
+
+
+def test_sort_large():
+    assertv("""
+    var x = [];
+    for (var i = 0; i < 2000; i++) { x.push((i * 7919) % 2000); }
+    x.sort(function(a, b) { return a - b; });
+    var ok = true;
+    for (var i = 0; i < 2000; i++) { if (x[i] !== i) { ok = false; } }
+    ok;
+    """, True)
+
+
+def test_sort_numeric_comparator(monkeypatch, capsys):
+    from js.builtins.array import _CompareFnSort
+
+    def lt(self, a, b):
+        raise AssertionError('comparefn called')
+    monkeypatch.setattr(_CompareFnSort, 'lt', lt)
+    assertp("var x = [10, 9.5, -1, 100, 0]; print(x.sort(function(a, b) { return a - b; }));", '-1,0,9.5,10,100', capsys)
+    assertp("var x = [10, 9.5, -1, 100, 0]; print(x.sort(function(x, y) { return y - x; }));", '100,10,9.5,0,-1', capsys)
+    assertp("var x = [1, NaN, 0]; print(x.sort(function(a, b) { return a - b; }));", '1,NaN,0', capsys)
+
+
+def test_sort_numeric_comparator_fallback(capsys):
+    # the elements are not all numbers or the function is not a - b
+    assertp("var x = ['10', 9, 1]; print(x.sort(function(a, b) { return a - b; }));", '1,9,10', capsys)
+    assertp("var x = [{valueOf: function() { return 2; }}, 1]; print(x.sort(function(a, b) { return a - b; })[0]);", '1', capsys)
+    assertp("var x = [1, 3, 2]; print(x.sort(function(a, b) { return a - a; }));", '1,3,2', capsys)
+    assertp("var x = [1, 3, 2]; print(x.sort(function(a, b) { return a % 2 - b % 2; }));", '2,1,3', capsys)
+
+
+def test_array_join(capsys):
+    assertp("var a = [1, 'a', null, undefined, 2.5]; print(a.join('-'));", '1-a---2.5', capsys)
+    assertp("var a = [1, 2]; a[4] = 3; print(a.join());", '1,2,,,3', capsys)
+    assertp("var a = []; print(a.join('-') === '');", 'true', capsys)
+    assertp("var a = [[1, 2], [3]]; print(a.join(';'));", '1,2;3', capsys)
+
+
+def test_heap_in_preallocated_array():
+    assertv("""
+    var n = 50, a = new Array(n + 1), i;
+    for (i = 1; i <= n; i++) { a[i] = (i * 37) % n; }
+    function sift(a, i, size) {
+        while (2 * i <= size) {
+            var c = 2 * i;
+            if (c < size && a[c + 1] > a[c]) { c++; }
+            if (a[i] >= a[c]) { return; }
+            var t = a[i]; a[i] = a[c]; a[c] = t; i = c;
+        }
+    }
+    for (i = n >> 1; i > 0; i--) { sift(a, i, n); }
+    for (i = n; i > 1; i--) { var t = a[1]; a[1] = a[i]; a[i] = t; sift(a, 1, i - 1); }
+    var ok = !(0 in a) && a.length == n + 1;
+    for (i = 2; i <= n; i++) { ok = ok && a[i - 1] <= a[i]; }
+    ok;
+    """, True)
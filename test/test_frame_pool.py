@@ -0,0 +1,84 @@
+from js.frame_pool import ValuePool
+
+
+def test_list_pool_reuse():
+    pool = ValuePool()
+    a = pool.acquire(3)
+    assert a == [None] * 3
+    a[0] = 1
+    a[1] = 2
+    pool.release(a)
+    assert pool.acquire(2) is not a
+    b = pool.acquire(3)
+    assert b is a
+    assert b == [None] * 3
+    assert pool.allocations == 2
+    assert pool.reuses == 1
+
+
+def test_list_pool_bounded():
+    pool = ValuePool()
+    lists = [pool.acquire(1) for i in range(ValuePool.MAX_FREE + 1)]
+    for l in lists:
+        pool.release(l)
+    assert len(pool.free[1]) == ValuePool.MAX_FREE
+
+
+def test_calls_reuse_frames():
+    from js.interpreter import Interpreter
+    from js.object_space import object_space, _w
+
+    jsint = Interpreter()
+    res = jsint.run_src("""
+    function fib(n) { if (n < 2) { return n; } return fib(n - 1) + fib(n - 2); }
+    function adder(a) { var b = a; return function(c) { return b + c; }; }
+    var add = adder(fib(10));
+    add(fib(5)) + add(1);
+    """)
+    assert res == _w(116)
+
+    pool = object_space.frame_pool
+    assert pool.reuses() > pool.allocations()
+
+
+def _released_entries(pool):
+    entries = []
+    for free in pool.values.free.values() + pool.refs.free.values():
+        for lst in free:
+            entries.extend(lst)
+    return entries
+
+
+def test_released_frames_are_cleared():
+    from js.interpreter import Interpreter
+    from js.object_space import object_space, _w
+
+    jsint = Interpreter()
+    # the catch lowers the stack pointer over the values pushed for the sum
+    res = jsint.run_src("""
+    function thrower() { throw 'x'; }
+    function f(a) { try { return a + [a, {}, thrower()].length; } catch (e) { return e; } }
+    f(1) + f(2);
+    """)
+    assert res == _w(u'xx')
+    entries = _released_entries(object_space.frame_pool)
+    assert entries
+    assert entries == [None] * len(entries)
+
+
+def test_calls_that_raise_release_frames():
+    from js.interpreter import Interpreter
+    from js.object_space import object_space, _w
+
+    jsint = Interpreter()
+    res = jsint.run_src("""
+    function thrower(a) { var b = a + 1; throw b; }
+    var n = 0;
+    for (var i = 0; i < 100; i++) { try { thrower(i); } catch (e) { n++; } }
+    n;
+    """)
+    assert res == _w(100)
+
+    pool = object_space.frame_pool
+    assert pool.allocations() < 10
+    assert pool.reuses() >= 100
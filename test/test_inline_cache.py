@@ -0,0 +1,111 @@
+from js.inline_cache import MemberCache, load_member, store_member, GlobalCache
+from js.jsobj import W_BasicObject, W__Array
+from js.object_space import _w
+
+
+def test_own_property_hit():
+    obj = W_BasicObject()
+    obj.put(u'foo', _w(1))
+    cache = MemberCache()
+
+    assert load_member(cache, obj, _w(u'foo')) == _w(1)
+    assert len(cache.entries) == 1
+    assert cache.lookup(obj, u'foo') == _w(1)
+
+
+def test_inherited_property_hit():
+    proto = W_BasicObject()
+    proto.put(u'foo', _w(1))
+    obj = W_BasicObject()
+    obj._prototype_ = proto
+    cache = MemberCache()
+
+    assert load_member(cache, obj, _w(u'foo')) == _w(1)
+    assert cache.lookup(obj, u'foo') == _w(1)
+
+    other = W_BasicObject()
+    other.put(u'foo', _w(2))
+    obj._prototype_ = other
+    assert cache.lookup(obj, u'foo') is None
+    assert load_member(cache, obj, _w(u'foo')) == _w(2)
+
+
+def test_map_change_misses():
+    obj = W_BasicObject()
+    obj.put(u'foo', _w(1))
+    cache = MemberCache()
+    load_member(cache, obj, _w(u'foo'))
+
+    obj.delete(u'foo')
+    assert cache.lookup(obj, u'foo') is None
+
+
+def test_polymorphic():
+    cache = MemberCache()
+    a = W_BasicObject()
+    a.put(u'foo', _w(1))
+    b = W_BasicObject()
+    b.put(u'bar', _w(0))
+    b.put(u'foo', _w(2))
+
+    assert load_member(cache, a, _w(u'foo')) == _w(1)
+    assert load_member(cache, b, _w(u'foo')) == _w(2)
+    assert len(cache.entries) == 2
+    assert cache.lookup(a, u'foo') == _w(1)
+    assert cache.lookup(b, u'foo') == _w(2)
+
+
+def test_store_hit():
+    obj = W_BasicObject()
+    obj.put(u'foo', _w(1))
+    cache = MemberCache()
+
+    store_member(cache, obj, _w(u'foo'), _w(2))
+    assert len(cache.entries) == 1
+    store_member(cache, obj, _w(u'foo'), _w(3))
+    assert obj.get(u'foo') == _w(3)
+
+
+def test_array_length_not_cached():
+    a = W__Array()
+    cache = MemberCache()
+    store_member(cache, a, _w(u'length'), _w(0))
+    assert cache.entries == []
+    store_member(cache, a, _w(u'0'), _w(0))
+    assert cache.entries == []
+
+
+def test_read_only_store_not_cached():
+    from js.jsobj import put_property
+    obj = W_BasicObject()
+    put_property(obj, u'foo', _w(1), writable=False)
+    cache = MemberCache()
+
+    store_member(cache, obj, _w(u'foo'), _w(2))
+    assert cache.entries == []
+    assert obj.get(u'foo') == _w(1)
+
+    assert load_member(cache, obj, _w(u'foo')) == _w(1)
+    assert len(cache.entries) == 1
+
+
+def test_global_defined_later_hits(monkeypatch):
+    from js.jsobj import W_GlobalObject
+    w_global = W_GlobalObject()
+    cache = GlobalCache()
+    assert cache.lookup(w_global, u'later') is None
+
+    w_global.put(u'later', _w(1))
+    cell = cache.lookup(w_global, u'later')
+    assert cell is not None and cell.value == _w(1)
+
+    lookups = []
+    global_cell = W_GlobalObject.global_cell
+
+    def counting_global_cell(self, name):
+        lookups.append(name)
+        return global_cell(self, name)
+    monkeypatch.setattr(W_GlobalObject, 'global_cell', counting_global_cell)
+    w_global.put(u'other', _w(2))
+    assert cache.lookup(w_global, u'later') is cell
+    assert lookups == []
@@ -455,6 +455,139 @@ def test_newwithargs(capsys):
     """, '1', capsys)
 
 
+def test_call_argument_order():
+    assertv("function f(a, b, c) { return a + '' + b + c; }; f(1, 2, 3);", '123')
+    assertv("var o = {f: function(a, b) { return this.x + a - b; }, x: 10}; o.f(5, 1);", 14)
+    assertv("function F(a, b) { this.v = a - b; }; var o = new F(5, 2); o.v;", 3)
+    assertv("function f(a, b) { return b; }; f(1, f(2, 3));", 3)
+
+
+def test_call_depth_limit():
+    from js.interpreter import Interpreter
+    from js.object_space import _w, object_space
+
+    src = '''
+    var depth = 0;
+    function f(n) { depth = n; return f(n + 1); }
+    var r;
+    try { f(1); } catch (e) { r = e; }
+    r + ' ' + depth;
+    '''
+    jsint = Interpreter({'max_call_depth': 50})
+    assert jsint.run_src(src) == _w(u'RangeError: Maximum call stack size exceeded 50')
+    assert object_space.call_depth == 0
+
+    # running out of host stack first is reported the same way
+    jsint = Interpreter({'max_call_depth': 1000000})
+    assert jsint.run_src("function f() { return f(); }; var r; try { f(); } catch (e) { r = e; }; r;") == \
+        _w(u'RangeError: Maximum call stack size exceeded')
+
+    assertv("function f(n) { if (n == 0) { return 0; } return f(n - 1) + 1; }; f(500);", 500)
+
+
+def test_deep_recursion():
+    # ackermann(3, 11) nests about 16k calls, only the host stack limits them
+    import sys
+    import threading
+    import js.jsparser  # sets the recursion limit when imported
+    from js.interpreter import Interpreter
+
+    src = """
+    function ack(m, n) {
+        if (m == 0) { return n + 1; }
+        if (n == 0) { return ack(m - 1, 1); }
+        return ack(m - 1, ack(m, n - 1));
+    }
+    function f(n) { if (n == 0) { return ack(2, 3); } return f(n - 1) + 1; }
+    f(16400);
+    """
+    results = []
+
+    def run():
+        results.append(Interpreter().run_src(src).ToInteger())
+
+    limit = sys.getrecursionlimit()
+    size = threading.stack_size(512 * 1024 * 1024)
+    sys.setrecursionlimit(200000)
+    try:
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+    finally:
+        threading.stack_size(size)
+        sys.setrecursionlimit(limit)
+    assert results == [16409]
+
+
+def test_global_cells(capsys):
+    assertp('''
+    x = 1;
+    function f() { return x; }
+    function g(v) { x = v; }
+    print(f());
+    g(2);
+    print(f());
+    delete x;
+    try { f(); } catch (e) { print(e); }
+    g(3);
+    print(f());
+    ''', '1\n2\nReferenceError: x is not defined\n3', capsys)
+    assertv("function f() { NaN = 1; undefined = 2; return NaN + '' + undefined; }; f();", 'NaNundefined')
+    assertv("var n = 0; for (var i = 0; i < 5; i++) { n = n + i; }; n;", 10)
+    # the sites first run before the global exists
+    assertp('''
+    function f() { try { return later; } catch (e) { return 'none'; } }
+    function g(v) { try { later2 = later; } catch (e) { } }
+    print(f());
+    g();
+    later = 4;
+    g();
+    print(f() + later2);
+    later = 5;
+    print(f());
+    ''', 'none\n8\n5', capsys)
+
+
+def test_quickened_operations():
+    from js.opcodes import ADD, LT, INT, FLOAT, STRING, GENERIC
+    from js.object_space import newint, newfloat
+    from js.jsobj import W_String
+
+    add = ADD()
+    assert add.operation(None, newint(1), newint(2)).ToInteger() == 3
+    assert add.kind == INT
+    assert add.operation(None, newint(1), newint(2)).ToInteger() == 3
+    assert add.operation(None, newint(1), newfloat(0.5)).ToNumber() == 1.5
+    assert add.kind == FLOAT
+    assert add.operation(None, newint(1), newint(2)).ToNumber() == 3
+    assert add.operation(None, W_String(u'a'), newint(2)).to_string() == u'a2'
+    assert add.kind == GENERIC
+
+    lt = LT()
+    assert lt.decision(W_String(u'a'), W_String(u'b')) is True
+    assert lt.kind == STRING
+    assert lt.decision(W_String(u'b'), W_String(u'a')) is False
+
+    code = """
+    function f(a, b) { return [a + b, a - b, a * b, a < b, a <= b, a > b, a >= b].join(); }
+    [f(1, 2), f(1.5, 2), f(1, 2), f('a', 'b'), f('3', '1'), f(1, 'x')].join(';');
+    """
+    assertv(code, '3,-1,2,true,true,false,false;3.5,-0.5,3,true,true,false,false;3,-1,2,true,true,false,false;ab,NaN,NaN,true,true,false,false;31,2,3,false,false,true,true;1x,NaN,NaN,false,false,false,false')
+    assertv("1.5 < 2.5;", True)
+    assertv("2.5 <= 1.5;", False)
+
+
+def test_with_body_stack():
+    assertv("""
+    var o = {v: 1};
+    function f(a, b, c) { return c; }
+    f(); f(); f(); f(); f(); f();
+    var r;
+    with (o) { r = f(1, 2, f(3, 4, v)); }
+    r;
+    """, 1)
+
+
 def test_increment():
     assertv("""
     var x;
@@ -1099,3 +1232,111 @@ def test_repeated_for_loop():
 
 def test_repeated_for_in():
     assertv("var a = [1,2,3]; var b = 0; for(var x = 0; x < 10; x++){for(var y in a) {b += y}}; b;", '0012012012012012012012012012012')
+
+
+def test_member_cache_prototype_change():
+    assertv("""
+    function A() {}; A.prototype.x = 1;
+    function B() {}; B.prototype.x = 2;
+    var o = new A();
+    var r = 0;
+    for(var i = 0; i < 4; i++) {
+        if(i == 2) { o.__proto__ = B.prototype; }
+        r = r * 10 + o.x;
+    }
+    r;
+    """, 1122)
+
+
+def test_member_cache_shadowing():
+    assertv("""
+    function A() {}; A.prototype.x = 1;
+    var o = new A();
+    var r = 0;
+    for(var i = 0; i < 4; i++) {
+        if(i == 2) { o.x = 5; }
+        r = r * 10 + o.x;
+    }
+    r;
+    """, 1155)
+
+
+def test_member_cache_array_length():
+    assertv("""
+    var a = [1, 2, 3];
+    for(var i = 0; i < 3; i++) { a.length = 3 - i; }
+    a.length + a.join('');
+    """, '11')
+
+
+def test_string_concat_loop():
+    assertv("""
+    var s = '';
+    for(var i = 0; i < 1000; i++) { s += 'ab'; }
+    s.length + ':' + s.charAt(1999) + (s == s + '') + s.substring(0, 4);
+    """, '2000:btrueabab')
+
+
+def test_primitive_method_call():
+    assertv("'abc'.charCodeAt(1);", 98)
+    assertv("var s = 'abc'; s.toUpperCase() + s.length;", 'ABC3')
+    assertv("(5).toString();", '5')
+    assertv("true.toString();", 'true')
+    assertv("(5).toLocaleString();", '[object Number]')
+    assertv("String.prototype.self = function() { var t = this; return typeof t; }; 'abc'.self();", 'object')
+
+
+def _run_counting(monkeypatch, cls, code):
+    # allocations of cls while running code, the builtins are set up before
+    from js.interpreter import Interpreter
+    jsint = Interpreter()
+    allocations = []
+    init = cls.__init__
+
+    def counting_init(self, *args):
+        allocations.append(self)
+        init(self, *args)
+    monkeypatch.setattr(cls, '__init__', counting_init)
+    return jsint.run_src(code), len(allocations)
+
+
+def test_native_method_on_primitive_does_not_box(monkeypatch):
+    from js.jsobj import W_StringObject
+    from js.object_space import _w
+    res, allocations = _run_counting(monkeypatch, W_StringObject, """
+    var s = 'abc', n = 0;
+    for (var i = 0; i < 100; i++) { n += s.charCodeAt(i % 3); }
+    n;
+    """)
+    assert res == _w(9799)
+    assert allocations == 0
+
+
+def test_native_method_on_number_and_boolean_does_not_box(monkeypatch):
+    from js.jsobj import W_NumericObject, W_BooleanObject
+    from js.object_space import _w
+    res, allocations = _run_counting(monkeypatch, W_NumericObject, """
+    var s = '';
+    for (var i = 0; i < 100; i++) { s = (i).toString() + (1.5).valueOf(); }
+    s;
+    """)
+    assert res == _w(u'991.5')
+    assert allocations == 0
+
+    res, allocations = _run_counting(monkeypatch, W_BooleanObject, """
+    var n = 0;
+    for (var i = 0; i < 100; i++) { if ((i > 50).valueOf()) { n++; } }
+    n + true.toString();
+    """)
+    assert res == _w(u'49true')
+    assert allocations == 0
+
+    # non strict code still sees a boxed this
+    assertv("Number.prototype.self = function() { var t = this; return typeof t; }; (5).self();", 'object')
+
+
+def test_proto_accessor():
+    assertv("function A() {}; var a = new A(); a.__proto__ === A.prototype;", True)
+    assertv("var a = {}; var b = {x: 1}; a.__proto__ = b; a.x;", 1)
+    assertv("'abc'.__proto__ === String.prototype;", True)
+    assertv("var a = {}; var n = 0; for (var k in a) { n++; }; n;", 0)
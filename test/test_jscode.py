@@ -1,4 +1,6 @@
 import py
+from test.test_interp import assertv
+from test.test_scope import _function_code, _opcodes
 
 #def assert_code_size(*args):
 #    from js.jscode import JsCode
@@ -45,3 +47,45 @@ import py
 #
 #        ctx = make_global_context()
 #        assert nf.run(ctx, [_w(1), _w(2)]).ToInteger() == 3
+
+
+def test_int_induction_variables():
+    ops = _opcodes(_function_code("function f(n) { for (var i = 0; i < n; i++) { } }"))
+    assert 'JUMP_IF_NOT_LT' in [op.split()[0] for op in ops]
+    assert 'INCR_LOCAL_INT "i" (1) 1' in ops
+
+    ops = _opcodes(_function_code("function f() { for (var i = 9; i >= 0; i -= 3) { } }"))
+    assert 'INCR_LOCAL_INT "i" (0) -3' in ops
+
+    # the body stores to the variable, only the comparison is specialised
+    ops = _opcodes(_function_code("function f() { for (var i = 0; i < 5; i++) { i = i + 0.5; } }"))
+    assert 'JUMP_IF_NOT_LT' in [op.split()[0] for op in ops]
+    assert 'INCR_LOCAL_INT' not in [op.split()[0] for op in ops]
+
+    # captured or not started from an int constant
+    ops = _opcodes(_function_code("function f() { for (var i = 0; i < 5; i++) { } return function() { return i; }; }"))
+    assert 'INCR_LOCAL_INT' not in [op.split()[0] for op in ops]
+    ops = _opcodes(_function_code("function f(n) { for (var i = n; i < 5; i++) { } }"))
+    assert 'INCR_LOCAL_INT' not in [op.split()[0] for op in ops]
+
+    assertv("function f(n) { var s = 0; for (var i = 0; i < n; i++) { s += i; } return s; }; f(10);", 45)
+    assertv("function f() { var r = []; for (var i = 10; i >= 0; i -= 3) { r.push(i); } return r.join(); }; f();", '10,7,4,1')
+    assertv("function f() { var r = []; for (var i = 0; i < 5; i++) { r.push(i); i = i + 0.5; } return r.join(); }; f();", '0,1.5,3,4.5')
+    assertv("function f() { var r = []; for (var i = 0; i <= '3'; i += 1) { r.push(i); } return r.join(); }; f();", '0,1,2,3')
+    assertv("function f() { var r = []; for (var i = 0; i < 2; i += 1) { r.push(i); i = 'a'; } return r.join(); }; f();", '0')
+    assertv("function f() { var r = []; for (var i = 2147483646; i < 2147483649; i++) { r.push(i); } return r.join(); }; f();", '2147483646,2147483647,2147483648')
+    assertv("function f() { var r = []; for (var i = 0; i < 6; i++) { if (i % 2) continue; r.push(i); if (i > 3) break; } return r + ':' + i; }; f();", '0,2,4:4')
+
+
+def test_numeric_comparator():
+    def comparator(src):
+        return _function_code(src).numeric_comparator()
+    assert comparator("function f(a, b) { return a - b; }") == 1
+    assert comparator("function f(a, b) { var c; return (a - b); }") == 1
+    assert comparator("function f(a, b) { return b - a; }") == -1
+    assert comparator("function f(a, b) { return a - a; }") == 0
+    assert comparator("function f(a, b) { return a + b; }") == 0
+    assert comparator("function f(a, b) { return a - c; }") == 0
+    assert comparator("function f(a, b) { return a - b - 1; }") == 0
+    assert comparator("function f(a, b) { b = 1; return a - b; }") == 0
+    assert comparator("function f(a, b) { return a - b; function g() { return a; } }") == 0
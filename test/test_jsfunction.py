@@ -346,6 +346,30 @@ class TestJsFunctionAndStuff(object):
 
         assert res.value == _w(42)
 
+    def test_native_function_call(self):
+        def f(this, args):
+            return _w(args[0].ToInteger() + 1)
+
+        from js.jsobj import W_NativeFunction
+        w_func = W_NativeFunction(JsNativeFunction(f))
+        assert w_func.Call([_w(41)]) == _w(42)
+
+        def this_of(this, args):
+            return this
+
+        w_func = W_NativeFunction(JsNativeFunction(this_of))
+        assert w_func.Call([]) is object_space.global_object
+        assert w_func.Call([], this=_w(u'a')) == _w(u'a')
+
+    def test_native_code_this_binding(self):
+        def this_of(this, args):
+            return this
+
+        # native code run in a function execution context keeps primitives
+        w_func = object_space.new_func(JsNativeFunction(this_of))
+        assert w_func.Call([]) is object_space.global_object
+        assert w_func.Call([], this=_w(5)) == _w(5)
+
     def test_foo15(self):
         code = JsCode()
         code.emit('LOAD_INTCONSTANT', 1)
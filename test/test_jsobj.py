@@ -2,6 +2,11 @@ from js.jsobj import W_BasicObject, PropertyDescriptor
 
 
 class TestWObjectProperties(object):
+    def test_starts_on_root_map(self):
+        from js.object_map import ROOT_MAP
+        obj = W_BasicObject()
+        assert obj._property_map_ is ROOT_MAP
+
     def test_has_property(self):
         obj = W_BasicObject()
         assert obj.has_property(u'foo') is False
@@ -33,6 +38,128 @@ class TestWObjectProperties(object):
         obj.put(u'foo', 1)
         assert obj.get(u'foo') == 1
 
+    def test_redefine_attributes(self):
+        obj = W_BasicObject()
+        obj.put(u'foo', 1)
+        obj.put(u'bar', 2)
+
+        obj.define_own_property(u'foo', PropertyDescriptor(writable=False))
+        desc = obj.get_own_property(u'foo')
+        assert desc.writable is False
+        assert desc.enumerable is True
+        assert desc.value == 1
+
+        obj.put(u'foo', 3)
+        assert obj.get(u'foo') == 1
+        obj.put(u'bar', 3)
+        assert obj.get(u'bar') == 3
+
+    def test_values_stored_in_slots(self):
+        obj = W_BasicObject()
+        obj.put(u'foo', 1)
+        idx = obj._property_map_.lookup(u'foo')
+        assert obj._property_slots_[idx] == 1
+
+    def test_delete_keeps_other_properties(self):
+        obj = W_BasicObject()
+        obj.put(u'foo', 1)
+        obj.put(u'bar', 2)
+        obj.put(u'baz', 3)
+
+        obj.delete(u'bar')
+        assert obj.has_property(u'bar') is False
+        assert obj.get(u'foo') == 1
+        assert obj.get(u'baz') == 3
+
+        obj.delete(u'baz')
+        obj.put(u'qux', 4)
+        assert obj.get(u'foo') == 1
+        assert obj.get(u'qux') == 4
+        assert obj._property_dict_ is None
+
+    def test_dict_mode_after_many_properties(self):
+        from js.jsobj import DICT_MODE_SIZE
+        obj = W_BasicObject()
+        for i in range(DICT_MODE_SIZE + 1):
+            obj.put(u'p%d' % i, i)
+
+        assert obj._property_dict_ is not None
+        assert obj._ic_cacheable(u'p1') is False
+        for i in range(DICT_MODE_SIZE + 1):
+            assert obj.get(u'p%d' % i) == i
+
+        obj.delete(u'p1')
+        assert obj.has_property(u'p1') is False
+        assert u'p2' in obj._named_properties_dict()
+
+    def test_dict_mode_after_delete(self):
+        from js.jsobj import DICT_MODE_DELETE_SIZE
+        obj = W_BasicObject()
+        for i in range(DICT_MODE_DELETE_SIZE + 1):
+            obj.put(u'p%d' % i, i)
+
+        obj.delete(u'p0')
+        assert obj._property_dict_ is not None
+        assert obj.has_property(u'p0') is False
+        assert obj.get(u'p%d' % DICT_MODE_DELETE_SIZE) == DICT_MODE_DELETE_SIZE
+
+def test_global_object_cells():
+    from js.jsobj import W_GlobalObject
+    obj = W_GlobalObject()
+    obj.put(u'foo', 1)
+    cell = obj.global_cell(u'foo')
+    version = obj._cells_version_
+
+    obj.put(u'foo', 2)
+    assert obj.global_cell(u'foo') is cell
+    assert cell.value == 2
+    obj.put(u'bar', 3)
+    assert obj._cells_version_ == version
+
+    obj.define_own_property(u'foo', PropertyDescriptor(writable=False))
+    assert obj._cells_version_ != version
+    version = obj._cells_version_
+    obj.delete(u'foo')
+    assert obj._cells_version_ != version
+    assert obj.global_cell(u'foo') is None
+
+def test_reads_do_not_allocate_descriptors(monkeypatch):
+    from js.jsobj import W__Array, W_StringObject
+    from js.property import Property
+    from js.property_descriptor import PropertyDescriptor
+    from js.object_space import _w, newundefined
+
+    proto = W_BasicObject()
+    proto.put(u'foo', _w(1))
+    for i in range(200):
+        proto.put(u'p%d' % i, _w(i))
+    assert proto._property_dict_ is not None
+    obj = W_BasicObject()
+    obj._prototype_ = proto
+    obj.put(u'own', _w(2))
+    array = W__Array()
+    array.w_put(_w(0), _w(3))
+    array._prototype_ = obj
+    string = W_StringObject(_w(u'abc'))
+
+    allocations = []
+    for cls in [Property, PropertyDescriptor]:
+        def counting_init(self, *args, **kwargs):
+            allocations.append(self)
+        monkeypatch.setattr(cls, '__init__', counting_init)
+
+    assert obj.get(u'foo') == _w(1)
+    assert obj.get(u'p3') == _w(3)
+    assert obj.get(u'missing') is newundefined()
+    assert array.get(u'own') == _w(2)
+    assert array.w_get(_w(1)) is newundefined()
+    assert array.w_get(_w(0)) == _w(3)
+    assert string.get(u'1') == _w(u'b')
+    assert obj.has_property(u'p3') is True
+    assert array.has_property(u'1') is False
+    assert string.has_property(u'2') is True
+    assert allocations == []
+
 #def test_intnumber():
     #n = W_IntNumber(0x80000000)
     #assert n.ToInt32() == -0x80000000
@@ -135,3 +135,53 @@ class TestMap(object):
         assert a.lookup('baz') == 1
 
         assert a == b
+
+    def test_index_table_shared_along_chain(self):
+        r = MapRoot()
+        a = r.add('foo')
+        b = a.add('bar')
+        c = b.add('baz')
+
+        assert c.lookup('foo') == 0
+        assert a._index_table_ is c._index_table_
+        assert a.lookup('bar') == Map.NOT_FOUND
+        assert b.lookup('baz') == Map.NOT_FOUND
+
+    def test_index_table_branch(self):
+        r = MapRoot()
+        a = r.add('foo')
+        b = a.add('bar')
+        c = a.add('baz')
+
+        assert b.lookup('bar') == 1
+        assert c.lookup('baz') == 1
+        assert c.lookup('bar') == Map.NOT_FOUND
+        assert b.lookup('baz') == Map.NOT_FOUND
+        assert b._index_table_ is not c._index_table_
+
+        d = b.add('baz')
+        assert d.lookup('baz') == 2
+        assert c.lookup('baz') == 1
+
+    def test_attrs(self):
+        r = MapRoot()
+        a = r.add('foo', 1)
+        b = r.add('foo', 2)
+        assert a is not b
+        assert a is r.add('foo', 1)
+
+        c = a.add('bar', 3)
+        assert c.lookup_attrs('foo') == 1
+        assert c.lookup_attrs('bar') == 3
+
+    def test_set_attrs(self):
+        r = MapRoot()
+        a = r.add('foo', 1).add('bar', 1).add('baz', 1)
+        b = a.set_attrs('bar', 2)
+
+        assert b.lookup('foo') == 0
+        assert b.lookup('bar') == 1
+        assert b.lookup('baz') == 2
+        assert b.lookup_attrs('bar') == 2
+        assert b.lookup_attrs('baz') == 1
+        assert a.lookup_attrs('bar') == 1
@@ -495,9 +495,8 @@ class TestToAstFunction(BaseTestToAST):
     def test_call(self):
         self.check('print("stuff")',[
             'LOAD_STRINGCONSTANT "stuff"',
-            'LOAD_LIST 1',
             'LOAD_VARIABLE "print"',
-            'CALL',
+            'CALL 1',
             'POP'])
 
     @xfail
@@ -0,0 +1,66 @@
+from js.jscode import JsCode
+
+
+def _compiled(*ops):
+    code = JsCode()
+    for op in ops:
+        if isinstance(op, tuple):
+            code.emit(*op)
+        else:
+            code.emit(op)
+    code.compile()
+    return [str(op) for op in code.compiled_opcodes]
+
+
+def test_removes_pushed_and_popped_values():
+    ops = _compiled(('LOAD_INTCONSTANT', 1), 'POP', 'LOAD_UNDEFINED', 'POP', ('LOAD_INTCONSTANT', 2))
+    assert ops == ['LOAD_INTCONSTANT 2']
+
+
+def test_keeps_pop_a_jump_lands_on():
+    ops = _compiled(('LOAD_INTCONSTANT', 1), ('JUMP_IF_TRUE', 0), ('LOAD_INTCONSTANT', 2), ('LABEL', 0), 'POP')
+    assert ops == ['LOAD_INTCONSTANT 1', 'JUMP_IF_TRUE 3', 'LOAD_INTCONSTANT 2', 'POP']
+
+
+def test_post_increment_statement():
+    ops = _compiled(('LOAD_LOCAL', 0, u'i'), 'UPLUS', 'DUP', 'INCR', ('STORE_LOCAL', 0, u'i'), 'POP', 'POP')
+    assert ops == ['LOAD_LOCAL "i" (0)', 'UPLUS', 'INCR', 'STORE_LOCAL "i" (0)', 'POP']
+
+
+def test_jump_threading():
+    ops = _compiled(('LOAD_BOOLCONSTANT', True), ('JUMP_IF_FALSE', 0), ('JUMP', 1),
+                    ('LABEL', 0), ('JUMP', 2), ('LABEL', 1), ('JUMP', 2), ('LABEL', 2),
+                    ('LOAD_INTCONSTANT', 1))
+    assert ops == ['LOAD_BOOLCONSTANT true', 'JUMP_IF_FALSE 2', 'LOAD_INTCONSTANT 1']
+
+    # a jump to itself stays
+    ops = _compiled(('LABEL', 0), ('JUMP', 0))
+    assert ops == ['JUMP 0']
+
+
+def test_dead_code_after_return():
+    ops = _compiled(('LOAD_INTCONSTANT', 1), 'RETURN', ('LOAD_INTCONSTANT', 2), 'POP', 'LOAD_UNDEFINED')
+    assert ops == ['LOAD_INTCONSTANT 1', 'RETURN']
+
+    # the jump over the dead load jumps to the next opcode once it is gone
+    ops = _compiled(('LOAD_INTCONSTANT', 1), ('JUMP', 0), ('LOAD_INTCONSTANT', 2), ('LABEL', 0), 'POP')
+    assert ops == []
+
+
+def test_stack_size_of_emitted_code():
+    code = JsCode()
+    code.emit('LOAD_INTCONSTANT', 1)
+    code.emit('LOAD_INTCONSTANT', 2)
+    code.emit('POP')
+    code.compile()
+    assert len(code.compiled_opcodes) == 1
+    assert code.estimated_stack_size() == 2
+
+
+def test_optimized_programs():
+    from test.test_interp import assertv
+    assertv("function f(a) { var j = 0; j++; if (a) { if (j) { j = 2; } else { j = 3; } } else { j = 4; } 5; return j; 6; }; f(true) + ',' + f(false);", '2,4')
+    assertv("var i = 0; i++; i++; i;", 2)
+    assertv("var s = 0; for (var i = 0; i < 3; i++) { if (i == 1) continue; s += i; }; s;", 2)
+    assertv("function f(x) { switch (x) { case 1: return 'a'; case 2: if (x) { return 'b'; } default: return 'c'; } }; f(1) + f(2) + f(3);", 'abc')
+    assertv("function f() { try { throw 1; return 2; } catch (e) { return 3; } }; f();", 3)
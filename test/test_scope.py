@@ -7,3 +7,141 @@ def test_variable_deletion():
     assertv("var x = 3; delete this.x;", False)
     assertv("x = 3; delete this.x;", True)
     assertv("var x = 3; delete this.x; x", 3)
+
+
+def _function_code(src):
+    from js.astbuilder import parse_to_ast
+    from js.jscode import ast_to_bytecode
+    ast = parse_to_ast(unicode(src))
+    code = ast_to_bytecode(ast, ast.symbol_map)
+    return code.opcodes[0].funcobj.get_js_code()
+
+
+def _opcodes(code):
+    return [str(op) for op in code.opcodes]
+
+
+def test_resolve_static_slots():
+    code = _function_code("function f(a) { var x; function g() { return a + x + y; } return x; }")
+    ops = _opcodes(code)
+    assert 'LOAD_SCOPED "x" (0, 1)' in ops
+    g = code.opcodes[0].funcobj.get_js_code()
+    ops = _opcodes(g)
+    # g allocates no environment of its own
+    assert 'LOAD_SCOPED "a" (0, 0)' in ops
+    assert 'LOAD_SCOPED "x" (0, 1)' in ops
+    assert 'LOAD_GLOBAL "y" (1)' in ops
+
+
+def test_resolve_locals():
+    code = _function_code("function f(a, b) { var x = a; function g() { return b; } return x + g(); }")
+    ops = _opcodes(code)
+    assert 'STORE_LOCAL "g" (1)' in ops
+    assert 'LOAD_LOCAL "a" (0)' in ops
+    assert 'STORE_LOCAL "x" (2)' in ops
+    assert code.locals_size() == 3
+    g = code.opcodes[0].funcobj.get_js_code()
+    assert 'LOAD_SCOPED "b" (0, 0)' in _opcodes(g)
+
+    ops = _opcodes(_function_code("function f(a) { try {} catch (e) { a = e; } return a; }"))
+    assert 'LOAD_SCOPED "a" (0, 0)' in ops
+
+
+def test_resolve_dynamic_with_eval_or_with():
+    ops = _opcodes(_function_code("function f(a) { eval(''); return a; }"))
+    assert 'LOAD_VARIABLE "a" (1)' in ops
+    ops = _opcodes(_function_code("function f(a, o) { with (o) {}; return a; }"))
+    assert 'LOAD_VARIABLE "a" (1)' in ops
+
+
+def test_static_scope_closures():
+    assertv("""
+    function counter() { var n = 0; return function() { n += 1; return n; }; }
+    var c = counter(); c(); c(); c();
+    """, 3)
+    assertv("""
+    function f(a) { function g() { return a + b; } var b = 2; return g(); }
+    f(1);
+    """, 3)
+    assertv("""
+    function f() { var x = 1; try { throw 'a'; } catch (x) { var g = function() { return x; }; } return g() + x; }
+    f();
+    """, 'a1')
+    assertv("""
+    var y = 1;
+    function f() { function g() { y = 5; } g(); return y; }
+    f();
+    """, 5)
+
+
+def test_environment_allocation():
+    assert not _function_code("function f(a) { var x = a; return x; }").has_environment()
+    assert _function_code("function f(a) { return function() { return a; }; }").has_environment()
+    assert _function_code("function f(a) { try {} catch (e) {} }").has_environment()
+    assert not _function_code("function f(a) { return arguments; }").has_environment()
+    assert _function_code("function f(a) { eval(''); }").has_environment()
+
+
+def test_lazy_arguments():
+    code = _function_code("function f(a) { return arguments[0] + a; }")
+    assert 'LOAD_ARGUMENTS (1)' in _opcodes(code)
+    assert code.has_arguments_object()
+    assert not _function_code("function f(a) { return a; }").has_arguments_object()
+    assert not _function_code("function f(arguments) { return arguments; }").has_arguments_object()
+
+    assertv("function f(a) { return arguments.length + arguments[1]; }; f(1, 2);", 4)
+    assertv("function f() { arguments = 3; return arguments; }; f();", 3)
+    assertv("function f() { var arguments; return arguments.length; }; f(1);", 1)
+    assertv("function f(arguments) { return arguments; }; f(5);", 5)
+    assertv("function f() { return typeof arguments; }; f();", 'object')
+    assertv("function f() { var g = function() {}; return arguments[0]; }; f(6);", 6)
+    assertv("function f() { try { throw 1; } catch (e) { return arguments[0]; } }; f(7);", 7)
+    assertv("function f() { return eval('arguments[0]'); }; f(8);", 8)
+
+
+def test_environment_layout():
+    layout = _function_code("function f(a, b) { var x; function g() { return b + x; } return arguments; }").environment_layout()
+    assert layout.binding_map.keys() == [u'b', u'x']
+    assert len(layout.slot_template) == 2
+    assert list(layout.parameter_slots) == [-1, 0]
+    assert list(layout.parameter_locals) == [0, -1]
+    assert layout.arguments_local >= 0
+    assert layout.arguments_slot == -1
+
+    layout = _function_code("function f(a) { eval(''); }").environment_layout()
+    assert layout.binding_map.keys() == [u'a', u'arguments']
+    assert layout.arguments_slot == 1
+
+    assertv("function f(a, b) { var c; function g() { return a + b + c; } c = 3; return g(); }; f(1, 2);", 6)
+    assertv("function f(a, a) { function g() { return a; } return g(); }; f(1, 2);", 2)
+    assertv("function f(a, b) { function g() { return typeof b; } return g(); }; f(1);", 'undefined')
+    assertv("function f(a) { eval('var x = a + 1'); return x; }; f(1);", 2)
+    assertv("function f() { eval('var x = 1; var y = 2; var z = 3'); return x + y + z; }; f();", 6)
+
+
+def test_locals():
+    assertv("function f(a, b) { var x = a * 2; x += b; return x; }; f(3, 1);", 7)
+    assertv("function f(a) { var a; return a; }; f(3);", 3)
+    assertv("function f(a, a) { return a; }; f(1, 2);", 2)
+    assertv("function f(a) { var x; return typeof x + typeof a; }; f();", 'undefinedundefined')
+    assertv("function f() { return g(); function g() { return 4; } }; f();", 4)
+    assertv("function f(a) { for (var k in a) { var r = k; } return r; }; f({q: 1});", 'q')
+    assertv("function f(n) { var s = 0; for (var i = 0; i < n; i++) { s += i; } return s; }; f(5);", 10)
+    assertv("function fib(n) { if (n < 2) { return n; } return fib(n - 1) + fib(n - 2); }; fib(10);", 55)
+    assertv("var x = 1; function f() { var x = 2; return delete x; }; f() + ',' + x;", 'false,1')
+    assertv("""
+    var o = {}; var h = function() { return this; }; var f;
+    with (o) { f = function() { return h() === o; }; }
+    f();
+    """, False)
+
+
+def test_static_scope_eval_and_with():
+    assertv("function f() { var x = 1; eval('x = 2'); return x; }; f();", 2)
+    assertv("function f() { var x = 1; function g() { eval('var x = 3'); return x; } return g() + x; }; f();", 4)
+    assertv("function f(o) { var x = 1; with (o) { return x; } }; f({x: 7});", 7)
+    # eval or with in a nested function see the bindings of the enclosing ones
+    assertv("function f(p) { var g = function() { return eval('p'); }; return g(); }; f('p');", 'p')
+    assertv("function h() { var a = 1; function inner() { eval('a = 3'); } inner(); return a; }; h();", 3)
+    assertv("function f(p) { function g() { function k() { return eval('p'); } return k(); } return g(); }; f(5);", 5)
+    assertv("function f(p) { var o = {}; function g() { with (o) { return p; } } return g(); }; f(6);", 6)
@@ -72,3 +72,16 @@ class TestStack(object):
         s.append(1)
         s.append(1)
         py.test.raises(AssertionError, s.append, 1)
+
+    def test_stack_pop_n(self):
+        s = Stack(99)
+        s.append(1)
+        s.append(2)
+        s.append(3)
+        assert s.pop_n(2) == [2, 3]
+        assert s._stack_pointer_ == 1
+        assert s._stack_[1] is None
+        assert s._stack_[2] is None
+        assert s.pop_n(0) == []
+        assert s.pop_n(1) == [1]
+        assert s._stack_pointer_ == 0
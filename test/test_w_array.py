@@ -47,3 +47,147 @@ def test_array_w_put():
     assert a.get(u'23') == 42
     assert a.w_get(_w(23)) == 42
     assert a.w_get(_w(u'23')) == 42
+
+
+def test_array_int_strategy():
+    from js.array_strategies import int_strategy
+    a = W__Array()
+    a.w_put(_w(0), _w(1))
+    a.w_put(_w(1), _w(2))
+    assert a._array_strategy_ is int_strategy
+    assert a.w_get(_w(1)) == _w(2)
+    assert a.get(u'length') == _w(2)
+
+
+def test_array_float_strategy():
+    from js.array_strategies import float_strategy
+    a = W__Array()
+    a.w_put(_w(0), _w(1.5))
+    assert a._array_strategy_ is float_strategy
+    assert a.w_get(_w(0)) == _w(1.5)
+
+
+def test_array_generalize_to_object():
+    from js.array_strategies import object_strategy
+    a = W__Array()
+    a.w_put(_w(0), _w(1))
+    a.w_put(_w(1), _w(u'foo'))
+    assert a._array_strategy_ is object_strategy
+    assert a.w_get(_w(0)) == _w(1)
+    assert a.w_get(_w(1)) == _w(u'foo')
+
+    a = W__Array()
+    a.w_put(_w(0), _w(1))
+    a.w_put(_w(0), _w(1.5))
+    assert a._array_strategy_ is object_strategy
+    assert a.w_get(_w(0)) == _w(1.5)
+
+
+def test_array_sparse_switches_to_dict():
+    from js.array_strategies import dict_strategy
+    a = W__Array()
+    a.w_put(_w(0), _w(1))
+    a.w_put(_w(1000), _w(3))
+    assert a._array_strategy_ is dict_strategy
+    assert a.w_get(_w(0)) == _w(1)
+    assert a.w_get(_w(1000)) == _w(3)
+    assert a.has_property(u'1') is False
+    assert a.get(u'length') == _w(1001)
+
+
+def test_array_holes_stay_dense():
+    from js.array_strategies import object_strategy
+    a = W__Array()
+    a.w_put(_w(0), _w(1))
+    a.w_put(_w(2), _w(3))
+    assert a._array_strategy_ is object_strategy
+    assert a.w_get(_w(0)) == _w(1)
+    assert a.w_get(_w(2)) == _w(3)
+    assert a.has_property(u'1') is False
+    assert a.get(u'length') == _w(3)
+
+    a.w_put(_w(1), _w(2))
+    assert a._array_strategy_ is object_strategy
+    assert a.w_get(_w(1)) == _w(2)
+
+    a.delete(u'1')
+    assert a._array_strategy_ is object_strategy
+    assert a.has_property(u'1') is False
+    assert a.w_get(_w(2)) == _w(3)
+
+
+def test_array_preallocated_stays_dense():
+    from js.array_strategies import object_strategy, dict_strategy
+    # filled from 1, like a heap
+    a = W__Array(_w(101))
+    for i in range(1, 101):
+        a.w_put(_w(i), _w(i))
+    assert a._array_strategy_ is object_strategy
+    assert a.has_property(u'0') is False
+    assert a.w_get(_w(100)) == _w(100)
+
+    # filled backwards
+    a = W__Array(_w(100))
+    for i in range(99, -1, -1):
+        a.w_put(_w(i), _w(i))
+    assert a._array_strategy_ is object_strategy
+    assert a.w_get(_w(0)) == _w(0)
+
+    # appended to at its length
+    a = W__Array(_w(100))
+    a.w_put(_w(100), _w(1))
+    a.w_put(_w(101), _w(2))
+    assert a._array_strategy_ is object_strategy
+    assert a.get(u'length') == _w(102)
+
+    a = W__Array()
+    for i in range(3):
+        a.w_put(_w(i), _w(i))
+    a.put(u'length', _w(50))
+    a.w_put(_w(50), _w(50))
+    assert a._array_strategy_ is object_strategy
+    assert a.has_property(u'49') is False
+    assert a.w_get(_w(2)) == _w(2)
+
+    # huge preallocated arrays are not
+    a = W__Array(_w(1 << 20))
+    a.w_put(_w((1 << 20) - 1), _w(1))
+    assert a._array_strategy_ is dict_strategy
+
+
+def test_array_delete():
+    from js.array_strategies import int_strategy, dict_strategy
+    a = W__Array()
+    for i in range(3):
+        a.w_put(_w(i), _w(i))
+
+    a.delete(u'2')
+    assert a._array_strategy_ is int_strategy
+    assert a.has_property(u'2') is False
+
+    a.delete(u'0')
+    assert a._array_strategy_ is dict_strategy
+    assert a.has_property(u'0') is False
+    assert a.w_get(_w(1)) == _w(1)
+
+
+def test_array_attributes_switch_to_dict():
+    from js.array_strategies import dict_strategy
+    from js.jsobj import PropertyDescriptor
+    a = W__Array()
+    a.w_put(_w(0), _w(1))
+    a.define_own_property(u'0', PropertyDescriptor(writable=False))
+    assert a._array_strategy_ is dict_strategy
+
+    a.w_put(_w(0), _w(2))
+    assert a.w_get(_w(0)) == _w(1)
+
+
+def test_array_length_truncates():
+    a = W__Array()
+    for i in range(3):
+        a.w_put(_w(i), _w(i))
+
+    a.put(u'length', _w(1))
+    assert a.has_property(u'1') is False
+    assert a.w_get(_w(0)) == _w(0)
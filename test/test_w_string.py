@@ -16,3 +16,92 @@ def test_isspace():
     assert _strip(u'    ') == u''
     assert _strip(u'  \t\t\r\n  ') == u''
     assert _strip(u'  \t\ts\r\n  ') == u's'
+
+
+def test_concat_strings():
+    from js.jsobj import concat_strings, W_ConcatString, W_AppendString, ROPE_MIN_LENGTH
+    short = concat_strings(W_String(u'a'), W_String(u'b'))
+    assert not isinstance(short, W_ConcatString)
+    assert short.to_string() == u'ab'
+
+    piece = W_String(u'x' * ROPE_MIN_LENGTH)
+    s = concat_strings(piece, W_String(u'y'))
+    assert isinstance(s, W_AppendString)
+    s = concat_strings(W_String(u'z'), s)
+    assert isinstance(s, W_ConcatString)
+    assert s.length() == ROPE_MIN_LENGTH + 2
+    assert s.to_boolean() is True
+    assert s.to_string() == u'z' + u'x' * ROPE_MIN_LENGTH + u'y'
+
+
+def test_append_shares_buffer():
+    from js.jsobj import concat_strings, ROPE_MIN_LENGTH
+    s = concat_strings(W_String(u'x' * ROPE_MIN_LENGTH), W_String(u'a'))
+    t = concat_strings(s, W_String(u'b'))
+    assert t._buffer_ is s._buffer_
+    # s does not own the buffer any more, appending to it again copies
+    u = concat_strings(s, W_String(u'c'))
+    assert u.to_string() == u'x' * ROPE_MIN_LENGTH + u'ac'
+    assert t.to_string() == u'x' * ROPE_MIN_LENGTH + u'ab'
+    assert s.to_string() == u'x' * ROPE_MIN_LENGTH + u'a'
+
+
+def _copied_chars(monkeypatch, build):
+    from rpython.rlib.rstring import UnicodeBuilder
+    import js.jsobj
+    copied = [0]
+
+    class CountingBuilder(UnicodeBuilder):
+        def append(self, s):
+            copied[0] += len(s)
+            UnicodeBuilder.append(self, s)
+    monkeypatch.setattr(js.jsobj, 'UnicodeBuilder', CountingBuilder)
+    result = build().to_string()
+    return result, copied[0]
+
+
+def test_append_loop_copies_linearly(monkeypatch):
+    from js.jsobj import concat_strings, ROPE_MIN_LENGTH
+    start = u'x' * ROPE_MIN_LENGTH
+    n = 10000
+
+    def append():
+        s = W_String(start)
+        for i in range(n):
+            s = concat_strings(s, W_String(u'ab'))
+        return s
+    result, copied = _copied_chars(monkeypatch, append)
+    assert result == start + u'ab' * n
+    assert copied == len(result)
+
+
+def test_rope_depth_bounded():
+    from js.jsobj import concat_strings, ROPE_MIN_LENGTH, ROPE_MAX_DEPTH
+    start = u'x' * ROPE_MIN_LENGTH
+    n = 1000
+
+    s = W_String(start)
+    for i in range(n):
+        s = concat_strings(W_String(u'ab'), s)
+        assert s.rope_depth() <= ROPE_MAX_DEPTH
+    assert s.to_string() == u'ab' * n + start
+
+    s = W_String(start)
+    for i in range(n):
+        s = concat_strings(W_String(u'a'), concat_strings(s, W_String(u'b')))
+        assert s.rope_depth() <= ROPE_MAX_DEPTH
+    assert s.to_string() == u'a' * n + start + u'b' * n
+
+
+def test_flattened_prefix_drops_buffer():
+    from js.jsobj import concat_strings, ROPE_MIN_LENGTH
+    s = concat_strings(W_String(u'x' * ROPE_MIN_LENGTH), W_String(u'a'))
+    t = concat_strings(s, W_String(u'b'))
+    assert s.to_string() == u'x' * ROPE_MIN_LENGTH + u'a'
+    assert s._buffer_ is None
+    assert t.owns_buffer()
+
+    t.to_string()
+    u = concat_strings(t, W_String(u'c'))
+    assert u._buffer_ is not None and u._buffer_.pieces[0] is t.to_string()
+    assert u.to_string() == u'x' * ROPE_MIN_LENGTH + u'abc'